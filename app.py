@@ -1,65 +1,104 @@
 # app.py
 from flask import Flask, render_template, request, jsonify, Response
+from werkzeug.utils import secure_filename
 from main import (
-    download_video,
-    extract_audio,
-    upload_file,
-    request_transcript,
-    poll_transcript,
+    start_transcription,
+    format_transcript_text,
+    start_risk_analysis,
     analyze_risks_with_ai,
+    split_risk_items,
     analyze_public_records,
+    analyze_public_batch,
     search_company_news,
     build_search_query,
-    display_news_results
+    display_news_results,
+    dedupe_news_results
 )
 import os
+import shutil
 import tempfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import json
 import time
 import requests
-from dotenv import load_dotenv
-from julep import Julep
-
-# --- Updated function to ensure directory exists before saving the transcript ---
-def save_transcript_text(transcript_json, output_textfile="results/transcript.txt"):
-    # Ensure the directory exists
-    directory = os.path.dirname(output_textfile)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    
-    with open(output_textfile, 'w', encoding='utf-8') as f:
-        f.write("Full Transcript:\n")
-        f.write(transcript_json.get("text", "") + "\n\n")
-        if transcript_json.get("utterances"):
-            f.write("Speaker Breakdown:\n")
-            for utterance in transcript_json["utterances"]:
-                f.write(f"Speaker {utterance.get('speaker', 'N/A')}: {utterance.get('text', '')}\n")
-    print(f"Transcript saved to {output_textfile}")
-# --- End updated function ---
+from jobs import JobManager, Pending, QueueFull
+from transcript_cache import transcript_cache
+from poller import poller
+from news_cache import news_cache
+from metrics import registry, traced_future
+from reports import report_store, file_hash, KINDS
+from ratelimit import limiters
+from streams import STREAM_PORT, STREAM_URL, EventStreamServer, job_stream, parse_last_event_id
 
 app = Flask(__name__)
-progress_status = {}
+job_manager = JobManager()
+COMPANY_SEARCH_WORKERS = int(os.getenv("COMPANY_SEARCH_WORKERS", 8))
+company_executor = ThreadPoolExecutor(max_workers=COMPANY_SEARCH_WORKERS, thread_name_prefix="company")
 
-# Create uploads directory if it doesn't exist
 UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-load_dotenv()
-JULEP_API_KEY = os.getenv("JULEP_API_KEY")
-
-# Initialize Julep Client for risk analysis.
-try:
-    julep_client = Julep(api_key=JULEP_API_KEY)
-    agent = julep_client.agents.create(
-        name="Risk Analyzer",
-        model="gpt-4o",
-        about="Detects risk-related keywords and phrases in a transcript."
-    )
-    print("Julep Agent created successfully for risk analysis.")
-except Exception as e:
-    print(f"Error creating Julep Agent: {str(e)}")
-    agent = None
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", 100))
+BATCH_MAX_MB = int(os.getenv("BATCH_MAX_MB", 500))
+# "on" runs the watchlist monitor inside the app; otherwise run `python monitor.py run` separately.
+MONITOR = os.getenv("MONITOR", "off")
+_monitor_lock = threading.Lock()
+_monitor = None
+
+def get_monitor():
+    """The watchlist monitor, created on first use so its database is only opened when needed."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            from monitor import Monitor
+            _monitor = Monitor()
+            if MONITOR == "on":
+                _monitor.start()
+        return _monitor
+
+# The asyncio event stream server starts with the first job, so the reloader's parent process never binds it.
+_stream_lock = threading.Lock()
+_stream_server = None
+
+def get_stream_server():
+    """The event stream server on STREAM_PORT, or None to serve streams from Flask."""
+    global _stream_server
+    with _stream_lock:
+        if _stream_server is None and STREAM_PORT:
+            try:
+                _stream_server = EventStreamServer(job_manager).start()
+            except OSError as e:
+                print(f"Could not start event stream server on port {STREAM_PORT}: {e}; streaming from Flask.")
+                _stream_server = False
+        return _stream_server or None
+
+def events_url(job_id):
+    if get_stream_server() is None:
+        return f"/jobs/{job_id}/events"
+    base = STREAM_URL or f"{request.scheme}://{request.host.rsplit(':', 1)[0]}:{STREAM_PORT}"
+    return f"{base.rstrip('/')}/jobs/{job_id}/events"
+
+registry.gauge("riskradar_event_streams", lambda: {
+    (): _stream_server.stats()['clients'] if _stream_server else 0
+})
+registry.gauge("riskradar_jobs", lambda: {
+    (("status", status),): count for status, count in job_manager.stats()['jobs'].items()
+})
+registry.gauge("riskradar_job_queue_depth", lambda: {(): job_manager.stats()['queued']})
+registry.gauge("riskradar_poller_watching", lambda: {(): poller.stats()['watching']})
+registry.gauge("riskradar_api_in_flight", lambda: {
+    (("provider", name),): limiter.stats()['in_flight'] for name, limiter in limiters.items()
+})
+registry.gauge("riskradar_api_waiting", lambda: {
+    (("provider", name),): limiter.stats()['waiting'] for name, limiter in limiters.items()
+})
+registry.gauge("riskradar_cache_lookups", lambda: {
+    (("cache", name), ("result", result)): stats[result]
+    for name, stats in (("transcripts", transcript_cache.stats()), ("news", news_cache.stats()))
+    for result in ("hits", "misses")
+})
 
 @app.route('/')
 def home():
@@ -69,6 +108,45 @@ def home():
 def media():
     return render_template('media.html')
 
+def unique_upload_path(filename):
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    return os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}-{secure_filename(filename) or 'upload'}")
+
+def save_upload(file):
+    """
+    Copy an uploaded file into UPLOAD_FOLDER in fixed-size blocks under a
+    unique name, so large records never sit in memory and concurrent uploads
+    with the same filename do not collide.
+    """
+    file_path = unique_upload_path(file.filename)
+    with open(file_path, 'wb') as f:
+        shutil.copyfileobj(file.stream, f, 1048576)
+    return file_path
+
+def expand_zip(zip_path, saved):
+    """
+    Extract the files of an uploaded zip into UPLOAD_FOLDER, appending
+    (name, file_path) to saved. Member names are only used for display; each
+    file gets its own unique name on disk.
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [
+            m for m in archive.infolist()
+            if not m.is_dir() and not os.path.basename(m.filename).startswith('.')
+            and not m.filename.startswith('__MACOSX/')
+        ]
+        # Checked before anything is written, so a zip of thousands of tiny files is refused up front.
+        if len(saved) + len(members) > BATCH_MAX_DOCUMENTS:
+            raise ValueError(f"At most {BATCH_MAX_DOCUMENTS} documents per batch.")
+        # file_size is enforced by zipfile while reading, so the declared total bounds the extracted size.
+        if sum(m.file_size for m in members) > BATCH_MAX_MB * 1048576:
+            raise ValueError(f"{os.path.basename(zip_path)} expands to more than {BATCH_MAX_MB} MB.")
+        for member in members:
+            file_path = unique_upload_path(os.path.basename(member.filename))
+            with archive.open(member) as source, open(file_path, 'wb') as f:
+                shutil.copyfileobj(source, f, 1048576)
+            saved.append((member.filename, file_path))
+
 @app.route('/public', methods=['GET', 'POST'])
 def public():
     """
@@ -82,29 +160,116 @@ def public():
             file = request.files['file']
             if file.filename == '':
                 return jsonify({'error': 'No selected file'}), 400
-            file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-            file.save(file_path)
-            analysis_type = request.form.get('analysisType')
-            if analysis_type == 'company':
-                summary, company_names = analyze_public_records(file_path)
-                os.remove(file_path)
-                return jsonify({
-                    'summary': f"<h2>Company Name Extraction Summary</h2><p>{summary}</p>",
-                    'company_names': company_names,
-                    'risk_reports': []
-                })
-            elif analysis_type == 'risk_single':
-                # For a single company risk analysis based on a public case document.
-                # Adjust the prompt in analyze_public_records to perform risk analysis.
-                summary, risk_report = analyze_public_records(file_path, analysis="risk_single")
+            file_path = save_upload(file)
+            try:
+                analysis_type = request.form.get('analysisType')
+                doc_hash = file_hash(file_path)
+                if analysis_type == 'company':
+                    summary, company_names = analyze_public_records(file_path)
+                    report_id = report_store.put('companies', "\n".join(company_names), source=file.filename,
+                                                 doc_hash=doc_hash, metadata={'summary': summary})
+                    return jsonify({
+                        'summary': f"<h2>Company Name Extraction Summary</h2><p>{summary}</p>",
+                        'company_names': company_names,
+                        'risk_reports': [],
+                        'report_id': report_id
+                    })
+                elif analysis_type == 'risk_single':
+                    # For a single company risk analysis based on a public case document.
+                    # Adjust the prompt in analyze_public_records to perform risk analysis.
+                    summary, risk_report = analyze_public_records(file_path, analysis="risk_single")
+                    report_id = report_store.put('risk_report', risk_report, source=file.filename,
+                                                 doc_hash=doc_hash, metadata={'summary': summary})
+                    return jsonify({
+                        'summary': f"<h2>Risk Analysis Summary</h2><p>{summary}</p>",
+                        'risk_report': risk_report,
+                        'report_id': report_id,
+                        'company_names': []  # Not needed in this mode
+                    })
+            finally:
                 os.remove(file_path)
-                return jsonify({
-                    'summary': f"<h2>Risk Analysis Summary</h2><p>{summary}</p>",
-                    'risk_report': risk_report,
-                    'company_names': []  # Not needed in this mode
-                })
     return render_template('public.html')
 
+@app.route('/public/batch', methods=['POST'])
+def public_batch():
+    """
+    Public records analysis of many documents for one counterparty. Accepts
+    several 'files' (any of which may be a zip of documents) and returns
+    per-document results plus the merged company list or risk summary.
+    """
+    uploads = [f for f in request.files.getlist('files') if f.filename]
+    if not uploads:
+        return jsonify({'error': 'No files provided'}), 400
+    analysis_type = request.form.get('analysisType', 'company')
+    saved = []
+    zips = []
+    try:
+        for file in uploads:
+            file_path = save_upload(file)
+            if zipfile.is_zipfile(file_path):
+                zips.append(file_path)
+                expand_zip(file_path, saved)
+            else:
+                saved.append((file.filename, file_path))
+            if len(saved) > BATCH_MAX_DOCUMENTS:
+                return jsonify({'error': f'At most {BATCH_MAX_DOCUMENTS} documents per batch.'}), 400
+        if not saved:
+            return jsonify({'error': 'No documents found in the upload'}), 400
+        doc_hashes = [file_hash(file_path) for name, file_path in saved]
+        if analysis_type == 'company':
+            results, companies = analyze_public_batch(saved)
+            for result, doc_hash in zip(results, doc_hashes):
+                result['report_id'] = report_store.put(
+                    'companies', "\n".join(c['name'] for c in result.get('companies', [])),
+                    source=result['filename'], doc_hash=doc_hash, metadata={'summary': result['summary']}
+                )
+            company_names = [c['name'] for c in companies]
+            return jsonify({
+                'summary': f"<h2>Company Name Extraction Summary</h2><p>Processed {len(results)} documents.</p>",
+                'documents': results,
+                'companies': companies,
+                'company_names': company_names,
+                'report_id': report_store.put('companies', "\n".join(company_names),
+                                              metadata={'documents': [r['filename'] for r in results]})
+            })
+        results, risk_report = analyze_public_batch(saved, analysis="risk_single")
+        for result, doc_hash in zip(results, doc_hashes):
+            result['report_id'] = report_store.put(
+                'risk_report', result.get('risk_report'), source=result['filename'], doc_hash=doc_hash,
+                metadata={'summary': result['summary']}
+            )
+        return jsonify({
+            'summary': f"<h2>Risk Analysis Summary</h2><p>Processed {len(results)} documents.</p>",
+            'documents': results,
+            'risk_report': risk_report,
+            'report_id': report_store.put('risk_report', risk_report,
+                                          metadata={'documents': [r['filename'] for r in results]})
+        })
+    except (zipfile.BadZipFile, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        for name, file_path in saved:
+            os.remove(file_path)
+        for file_path in zips:
+            os.remove(file_path)
+
+
+def analyze_company(company_name, data):
+    if data and data.get("news_results"):
+        formatted_news = display_news_results(data)
+        risk_report = analyze_risks_with_ai(formatted_news, output_file=None, news=True)
+        report_store.put('news', formatted_news, company=company_name)
+        return {
+            'company_name': company_name,
+            'risk_report': risk_report,
+            'news_results': formatted_news,
+            'report_id': report_store.put('risk_report', risk_report, company=company_name)
+        }
+    return {
+        'company_name': company_name,
+        'risk_report': 'No news results found.',
+        'news_results': ''
+    }
 
 @app.route('/company', methods=['POST'])
 def company_search():
@@ -113,75 +278,165 @@ def company_search():
         companies = data.get('companies', [])
         if not companies:
             return jsonify({'error': 'No company names provided.'}), 400
-        risk_reports = []
-        for company_name in companies:
-            query = build_search_query(company_name, ["bankruptcy", "lawsuit", "fraud"])
-            data = search_company_news(query)
-            if data and "news_results" in data:
-                formatted_news = display_news_results(data)
-                risk_report = analyze_risks_with_ai(formatted_news)
-                risk_reports.append({
-                    'company_name': company_name,
-                    'risk_report': risk_report,
-                    'news_results': formatted_news
-                })
-            else:
-                risk_reports.append({
-                    'company_name': company_name,
-                    'risk_report': 'No news results found.',
-                    'news_results': ''
-                })
+        queries = [build_search_query(company_name, ["bankruptcy", "lawsuit", "fraud"]) for company_name in companies]
+        # map() yields results in input order even though companies finish out of order.
+        news = dedupe_news_results(list(company_executor.map(search_company_news, queries)))
+        risk_reports = list(company_executor.map(analyze_company, companies, news))
         return jsonify({'success': True, 'risk_reports': risk_reports})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/watchlist', methods=['GET', 'POST', 'DELETE'])
+def watchlist():
+    """GET lists the watched companies; POST and DELETE take {"companies": [...]} to add or remove."""
+    monitor = get_monitor()
+    if request.method == 'GET':
+        return jsonify({'companies': monitor.store.companies(), 'last_sweep': monitor.last_sweep})
+    data = request.get_json(silent=True) or {}
+    companies = [c.strip() for c in data.get('companies', []) if isinstance(c, str) and c.strip()]
+    if not companies:
+        return jsonify({'error': 'No company names provided.'}), 400
+    if request.method == 'POST':
+        changed = monitor.store.add(companies)
+    else:
+        changed = monitor.store.remove(companies)
+    return jsonify({'success': True, 'changed': changed, 'watching': monitor.store.size()})
+
+@app.route('/watchlist/alerts', methods=['GET'])
+def watchlist_alerts():
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'alerts': get_monitor().sink.recent(max(1, min(limit, 1000)))})
+
+# A /process job is three steps; the worker is handed back while AssemblyAI and then Julep do their part.
+def run_process_job(job, url):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        transcribing = start_transcription(url, temp_dir, on_stage=job.update)
+    return Pending(transcribing, partial(analyze_transcript, url=url))
+
+def analyze_transcript(job, transcribing, url):
+    transcript_json = transcribing.result()
+    transcript_text = format_transcript_text(transcript_json)
+    job.emit('transcript', {'transcript': transcript_text})
+    job.update('analyzing', 'Analyzing risks...', 80)
+    analyzing = traced_future("analyze_risks_with_ai", start_risk_analysis(
+        transcript_text, utterances=transcript_json.get("utterances"),
+        on_prescreen=lambda categories: job.emit('prescreen', {'categories': categories})
+    ), failed=lambda report: not report)
+    return Pending(analyzing, partial(report_risks, url=url, transcript_json=transcript_json,
+                                      transcript_text=transcript_text))
+
+def report_risks(job, analyzing, url, transcript_json, transcript_text):
+    risk_report = analyzing.result().replace("**", "")
+    for index, item in enumerate(split_risk_items(risk_report)):
+        job.emit('risk', {'index': index, 'text': item})
+    metadata = {'transcript_id': transcript_json.get('id')}
+    report_store.put('transcript', transcript_text, source=url, metadata=metadata)
+    return {
+        'transcript': transcript_text,
+        'risk_report': risk_report,
+        'report_id': report_store.put('risk_report', risk_report, source=url, metadata=metadata)
+    }
+
 @app.route('/process', methods=['POST'])
 def process_video():
+    url = request.form.get('url')
+    if not url:
+        return jsonify({'error': 'No URL provided'}), 400
     try:
-        url = request.form.get('url')
-        if not url:
-            return jsonify({'error': 'No URL provided'}), 400
-        with tempfile.TemporaryDirectory() as temp_dir:
-            progress_status['status'] = 'downloading'
-            progress_status['message'] = 'Downloading video...'
-            progress_status['progress'] = 10
-            video_file = os.path.join(temp_dir, 'video.mp4')
-            if not download_video(url, video_file):
-                raise Exception('Video download failed')
-            progress_status['status'] = 'processing_audio'
-            progress_status['message'] = 'Extracting audio...'
-            progress_status['progress'] = 30
-            audio_file = os.path.join(temp_dir, 'audio.mp3')
-            if not extract_audio(video_file, audio_file):
-                raise Exception('Audio extraction failed')
-            progress_status['status'] = 'transcribing'
-            progress_status['message'] = 'Transcribing audio...'
-            progress_status['progress'] = 50
-            audio_url = upload_file(audio_file)
-            transcript_id = request_transcript(audio_url)
-            transcript_json = poll_transcript(transcript_id)
-            progress_status['status'] = 'analyzing'
-            progress_status['message'] = 'Analyzing risks...'
-            progress_status['progress'] = 80
-            transcript_filename = os.path.join('results', 'transcript.txt')
-            save_transcript_text(transcript_json, transcript_filename)
-            with open(transcript_filename, 'r', encoding='utf-8') as f:
-                transcript_text = f.read()
-            risk_report = analyze_risks_with_ai(transcript_text).replace("**", "")
-            progress_status['status'] = 'completed'
-            progress_status['message'] = 'Analysis complete!'
-            progress_status['progress'] = 100
-            return jsonify({
-                'success': True,
-                'transcript': transcript_text,
-                'risk_report': risk_report
-            })
-    except Exception as e:
-        progress_status['status'] = 'error'
-        progress_status['message'] = str(e)
-        return jsonify({'error': str(e)}), 500
+        job = job_manager.submit('process', run_process_job, url)
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({'success': True, 'job_id': job.id, 'events_url': events_url(job.id)}), 202
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/reports/search', methods=['GET'])
+def reports_search():
+    """Stored transcripts, news and reports mentioning every word of ?q=, newest first."""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind')
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    if kind and kind not in KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(KINDS)}"}), 400
+    results = report_store.search(
+        query, kind=kind, company=request.args.get('company'),
+        limit=max(1, min(request.args.get('limit', 20, type=int), 200)),
+        offset=max(0, request.args.get('offset', 0, type=int))
+    )
+    return jsonify({'results': results})
+
+@app.route('/reports/latest', methods=['GET'])
+def reports_latest():
+    """The latest stored item for ?company= or ?source= (a URL or filename); ?kind= defaults to risk_report."""
+    company = request.args.get('company')
+    source = request.args.get('source')
+    kind = request.args.get('kind', 'risk_report')
+    if not company and not source:
+        return jsonify({'error': 'Provide a company or a source'}), 400
+    if kind not in KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(KINDS)}"}), 400
+    record = report_store.latest(company=company, source=source, kind=kind)
+    if record is None:
+        return jsonify({'error': 'No report found'}), 404
+    return jsonify(record)
+
+@app.route('/reports/<int:report_id>', methods=['GET'])
+def report_detail(report_id):
+    record = report_store.get(report_id)
+    if record is None:
+        return jsonify({'error': 'Unknown report ID'}), 404
+    return jsonify(record)
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'transcripts': transcript_cache.stats(),
+        'poller': poller.stats(),
+        'news': news_cache.stats(),
+        'reports': report_store.stats()
+    })
+
+@app.route('/webhooks/assemblyai', methods=['POST'])
+def assemblyai_webhook():
+    # AssemblyAI posts {"transcript_id": ..., "status": ...} when a transcript finishes;
+    # wake the matching poller watch so it fetches the result right away.
+    data = request.get_json(silent=True) or {}
+    transcript_id = data.get('transcript_id')
+    if not transcript_id:
+        return jsonify({'error': 'No transcript_id provided'}), 400
+    return jsonify({'success': True, 'watched': poller.notify(f"aai:{transcript_id}")})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job ID'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events for a job; see streams.py. Holds a request thread while open."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job ID'}), 404
+    last_id = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    return Response(job_stream(job, last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# The monitor is never started on import: spawned extraction workers re-import this module
+# and the reloader's parent process imports it too, and each would run its own sweeps.
+@app.before_request
+def start_monitor():
+    if MONITOR == "on" and _monitor is None:
+        get_monitor()
 
 if __name__ == '__main__':
     import os
     port = int(os.environ.get("PORT", 5000))
+    # Under the reloader only the child (WERKZEUG_RUN_MAIN) serves requests.
+    if MONITOR == "on" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_monitor()
     app.run(host='0.0.0.0', port=port, debug=True)
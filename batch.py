@@ -0,0 +1,285 @@
+# batch.py
+"""
+Bulk risk analysis of social video URLs.
+
+    python batch.py urls.txt --output batch_results.jsonl
+    cat urls.txt | python batch.py - --download-workers 8
+
+Download, audio extraction, upload, transcription and analysis run as
+separate stages with their own workers, so different clips overlap in
+different stages. Transcriptions are waited on through the shared poller
+rather than by worker threads. One JSON record per URL is appended to the
+output file as it finishes; rerunning with the same output skips URLs that
+already have a record, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from main import (
+    AUDIO_EXTRACT_MODE,
+    get_video_id,
+    download_audio,
+    download_video,
+    extract_audio,
+    upload_file,
+    request_transcript,
+    watch_transcript,
+    estimate_transcription_seconds,
+    format_transcript_text,
+    analyze_risks_with_ai
+)
+from transcript_cache import transcript_cache, audio_key
+from reports import report_store
+from ratelimit import lane
+
+STAGES = ("download", "extract", "upload", "analyze")
+# Returned by a stage that hands the item on asynchronously.
+PENDING = object()
+
+
+def read_urls(source):
+    stream = sys.stdin if source == "-" else open(source, 'r', encoding='utf-8')
+    try:
+        for line in stream:
+            url = line.strip()
+            if url and not url.startswith("#"):
+                yield url
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def load_checkpoint(output_path, retry_errors=False):
+    """URLs that already have a record in output_path."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if retry_errors and record.get("status") != "ok":
+                continue
+            done.add(record["url"])
+    return done
+
+
+class BatchRunner:
+    def __init__(self, output_path, workers, transcribe_in_flight):
+        self.output_path = output_path
+        self.workers = workers
+        self.queues = {stage: queue.Queue(maxsize=workers[stage] * 2) for stage in STAGES}
+        # Fed from poller callbacks, which must never block.
+        self.queues["analyze"] = queue.Queue()
+        self.transcribing = threading.BoundedSemaphore(transcribe_in_flight)
+        self.workdir = tempfile.mkdtemp(prefix="riskradar-batch-")
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._finished = 0
+        self._all_done = threading.Condition(self._lock)
+        self._output = open(output_path, 'a', encoding='utf-8')
+
+    def _worker(self, stage, fn):
+        # Batch calls queue behind interactive requests at each provider's rate limit.
+        with lane("batch"):
+            while True:
+                item = self.queues[stage].get()
+                start = time.perf_counter()
+                try:
+                    next_stage = fn(item)
+                except Exception as e:
+                    item['error'] = f"{stage}: {e}"
+                    next_stage = None
+                with self._lock:
+                    self.stage_seconds[stage] += time.perf_counter() - start
+                    self.stage_calls[stage] += 1
+                if next_stage is None:
+                    self._finish(item)
+                elif next_stage is not PENDING:
+                    self.queues[next_stage].put(item)
+
+    def download(self, item):
+        item['video_id'] = get_video_id(item['url'])
+        if item['video_id']:
+            transcript_json = transcript_cache.get_by_video_id(item['video_id'])
+            if transcript_json is not None:
+                item['transcript_json'] = transcript_json
+                item['cached'] = True
+                return "analyze"
+        os.makedirs(item['workdir'])
+        if AUDIO_EXTRACT_MODE == "fast":
+            item['audio_file'] = download_audio(item['url'], item['workdir'])
+            if item['audio_file']:
+                return "upload"
+        item['video_file'] = download_video(item['url'], os.path.join(item['workdir'], 'video.mp4'))
+        if not item['video_file']:
+            raise Exception('Video download failed')
+        return "extract"
+
+    def _cached(self, item, media_file):
+        """Key item by the hash of its downloaded media and pick up a cached transcript if there is one."""
+        item['audio_key'] = audio_key(media_file)
+        transcript_json = transcript_cache.get(item['audio_key'])
+        if transcript_json is None:
+            return False
+        if item['video_id']:
+            transcript_cache.add_alias(item['video_id'], item['audio_key'])
+        item['transcript_json'] = transcript_json
+        item['cached'] = True
+        return True
+
+    def extract(self, item):
+        # Keyed on the video like transcribe_url, so a cache hit skips extraction too.
+        if self._cached(item, item['video_file']):
+            return "analyze"
+        item['audio_file'] = extract_audio(item['video_file'], os.path.join(item['workdir'], 'audio.mp3'))
+        if not item['audio_file']:
+            raise Exception('Audio extraction failed')
+        return "upload"
+
+    def upload(self, item):
+        if 'audio_key' not in item and self._cached(item, item['audio_file']):
+            return "analyze"
+        audio_url = upload_file(item['audio_file'])
+        item['transcript_id'] = request_transcript(audio_url)
+        expected_duration = estimate_transcription_seconds(os.path.getsize(item['audio_file']))
+        # Blocks this upload worker once transcribe_in_flight transcriptions are pending.
+        self.transcribing.acquire()
+        future = watch_transcript(item['transcript_id'], expected_duration)
+        future.add_done_callback(lambda f: self._transcribed(item, f))
+        return PENDING
+
+    def _transcribed(self, item, future):
+        # Runs as a done callback, where an exception would be swallowed and the item never finished.
+        self.transcribing.release()
+        try:
+            item['transcript_json'] = future.result()
+            transcript_cache.put(item['audio_key'], item['transcript_json'], item['video_id'])
+        except Exception as e:
+            item['error'] = f"transcribe: {e}"
+            self._finish(item)
+            return
+        self.queues["analyze"].put(item)
+
+    def analyze(self, item):
+        transcript_json = item['transcript_json']
+        item['transcript'] = format_transcript_text(transcript_json)
+        item['risk_report'] = analyze_risks_with_ai(
+            item['transcript'], output_file=None, utterances=transcript_json.get("utterances")
+        )
+        metadata = {'transcript_id': transcript_json.get('id'), 'batch': self.output_path}
+        report_store.put('transcript', item['transcript'], source=item['url'], metadata=metadata)
+        if not item['risk_report']:
+            # analyze_risks_with_ai returns "" on failure; an error record lets --retry-errors pick the URL up again.
+            raise Exception("risk analysis failed")
+        report_store.put('risk_report', item['risk_report'], source=item['url'], metadata=metadata)
+        return None
+
+    def _finish(self, item):
+        shutil.rmtree(item['workdir'], ignore_errors=True)
+        record = {
+            'url': item['url'],
+            'status': 'error' if item.get('error') else 'ok',
+            'video_id': item.get('video_id'),
+            'transcript_id': item.get('transcript_id'),
+            'cached': item.get('cached', False),
+            'transcript': item.get('transcript'),
+            'risk_report': item.get('risk_report'),
+            'error': item.get('error'),
+            'seconds': round(time.time() - item['started'], 3)
+        }
+        with self._lock:
+            self._output.write(json.dumps(record) + "\n")
+            self._output.flush()
+            os.fsync(self._output.fileno())
+            self.counts[record['status']] += 1
+            self._finished += 1
+            self._all_done.notify_all()
+        print(f"[{record['status']}] {item['url']} ({record['seconds']}s)")
+
+    def run(self, urls):
+        for stage in STAGES:
+            fn = getattr(self, stage)
+            for i in range(self.workers[stage]):
+                threading.Thread(target=self._worker, args=(stage, fn), name=f"batch-{stage}-{i}", daemon=True).start()
+        start = time.time()
+        for url in urls:
+            with self._lock:
+                index = self._submitted
+                self._submitted += 1
+            item = {'url': url, 'started': time.time(), 'workdir': os.path.join(self.workdir, str(index))}
+            self.queues["download"].put(item)
+        with self._all_done:
+            while self._finished < self._submitted:
+                self._all_done.wait()
+        self._output.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        return time.time() - start
+
+    def summary(self, elapsed, skipped):
+        processed = self._finished
+        return {
+            'processed': processed,
+            'ok': self.counts['ok'],
+            'errors': self.counts['error'],
+            'skipped_from_checkpoint': skipped,
+            'elapsed_s': round(elapsed, 1),
+            'urls_per_minute': round(processed / elapsed * 60, 2) if elapsed else 0.0,
+            'avg_stage_seconds': {
+                stage: round(self.stage_seconds[stage] / self.stage_calls[stage], 3)
+                for stage in STAGES if self.stage_calls[stage]
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="file with one URL per line, or - for stdin")
+    parser.add_argument('--output', default="batch_results.jsonl")
+    parser.add_argument('--download-workers', type=int, default=4)
+    parser.add_argument('--extract-workers', type=int, default=2)
+    parser.add_argument('--upload-workers', type=int, default=4)
+    parser.add_argument('--transcribe-in-flight', type=int, default=32,
+                        help="transcriptions waiting at AssemblyAI at once")
+    parser.add_argument('--analyze-workers', type=int, default=4)
+    parser.add_argument('--retry-errors', action='store_true', help="reprocess URLs whose earlier record is an error")
+    args = parser.parse_args()
+
+    done = load_checkpoint(args.output, args.retry_errors)
+    skipped = 0
+
+    def pending_urls():
+        nonlocal skipped
+        seen = set()
+        for url in read_urls(args.input):
+            if url in done or url in seen:
+                skipped += 1
+                continue
+            seen.add(url)
+            yield url
+
+    runner = BatchRunner(args.output, {
+        'download': args.download_workers,
+        'extract': args.extract_workers,
+        'upload': args.upload_workers,
+        'analyze': args.analyze_workers
+    }, args.transcribe_in_flight)
+    elapsed = runner.run(pending_urls())
+    print(json.dumps(runner.summary(elapsed, skipped), indent=2))
+
+
+if __name__ == '__main__':
+    main()
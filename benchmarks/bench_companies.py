@@ -0,0 +1,143 @@
+# benchmarks/bench_companies.py
+"""
+Local company extraction against a synthetic gazetteer.
+
+Builds an index of --names companies, then reports how long opening it takes
+(mmap) next to loading the same names into a Python dict, how fast filings
+are scanned, and how many model calls company mode makes with
+COMPANY_EXTRACTOR=llm, hybrid and local on synthetic PDFs.
+
+    python benchmarks/bench_companies.py --names 1000000 --documents 8 --pages 40
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import companies
+from bench_documents import make_pdf, fake_analysis, COMPANIES
+
+SYLLABLES = "ac me nor th wind he li os sol ar ver ta gri d blu e ri dge cap it al fin tek gen ix".split()
+SUFFIXES = ["Inc.", "LLC", "Ltd", "Corp.", "GmbH", "plc", "Holdings LLC"]
+
+
+def make_gazetteer(path, count):
+    rng = random.Random(count)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for name in COMPANIES:
+            writer.writerow([name, name.rsplit(" ", 1)[0]])
+        for i in range(count):
+            words = [("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))).title()
+                     for _ in range(rng.randint(1, 3))]
+            name = f"{' '.join(words)} {i} {rng.choice(SUFFIXES)}"
+            writer.writerow([name, f"{' '.join(words)} {i}"])
+
+
+def bench_index(source, index):
+    start = time.perf_counter()
+    entries = companies.build_gazetteer(source, index)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gazetteer = companies.Gazetteer(index)
+    mmap_open = time.perf_counter() - start
+
+    def load_dict():
+        in_memory = {}
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                for name in row:
+                    in_memory.setdefault(companies.normalize_name(name), row[0])
+        return in_memory
+    start = time.perf_counter()
+    in_memory = load_dict()
+    dict_load = time.perf_counter() - start
+    # Memory is measured on a second load, since tracing slows the first one down several times.
+    tracemalloc.start()
+    load_dict()
+    dict_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    keys = random.Random(1).sample(list(in_memory), min(20000, len(in_memory)))
+    start = time.perf_counter()
+    for key in keys:
+        gazetteer.lookup(key)
+    per_lookup = (time.perf_counter() - start) / len(keys)
+    return gazetteer, {
+        'entries': entries,
+        'index_mb': round(os.path.getsize(index) / 1048576, 1),
+        'build_s': round(build, 3),
+        'mmap_open_ms': round(mmap_open * 1000, 3),
+        'dict_load_s': round(dict_load, 3),
+        'dict_peak_mb': round(dict_peak / 1048576, 1),
+        'lookup_us': round(per_lookup * 1e6, 2)
+    }
+
+
+def bench_modes(paths, gazetteer, args):
+    import main
+    from documents import iter_pages
+    companies._extractor = companies.CompanyExtractor(gazetteer)
+
+    text = "\n".join(page for _, page in iter_pages(paths[0]))
+    start = time.perf_counter()
+    found = companies.get_extractor().extract(text)
+    scan = time.perf_counter() - start
+
+    results = {'scan_mb_per_s': round(len(text) / 1048576 / scan, 2), 'candidates_in_first_document': len(found)}
+    fake = fake_analysis(args.latency, args.per_1k_tokens)
+    for mode in ("llm", "hybrid", "local"):
+        calls = []
+
+        def run_analysis_task(kind, text):
+            calls.append(kind)
+            if kind == "company_confirm":
+                time.sleep(args.latency)
+                return "succeeded", "\n".join(line[2:].split(":")[0] for line in text.splitlines())
+            return fake(kind, text)
+        main.run_analysis_task = run_analysis_task
+        main.COMPANY_EXTRACTOR = mode
+        start = time.perf_counter()
+        names = [main.analyze_public_records(path)[1] for path in paths]
+        results[mode] = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'model_calls': len(calls),
+            'first_document_names': names[0]
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--names', type=int, default=200000, help="companies in the synthetic gazetteer")
+    parser.add_argument('--documents', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per stand-in Julep call")
+    parser.add_argument('--per-1k-tokens', type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "gazetteer.csv")
+        index = os.path.join(workdir, "companies.idx")
+        make_gazetteer(source, args.names)
+        gazetteer, index_report = bench_index(source, index)
+        paths = []
+        for i in range(args.documents):
+            path = os.path.join(workdir, f"filing-{i}.pdf")
+            make_pdf(path, args.pages)
+            paths.append(path)
+        report = {'params': vars(args), 'index': index_report, 'extraction': bench_modes(paths, gazetteer, args)}
+        gazetteer.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_documents.py
+"""
+Latency and peak Python memory of public-record analysis on synthetic PDFs.
+Compares the old read-everything-then-prompt path with the chunked
+map-reduce pipeline; the Julep call is replaced by a fixed-latency stand-in.
+
+    python benchmarks/bench_documents.py --pages 50 500 2000 --latency 0.2 --per-1k-tokens 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fitz
+import documents
+
+WORDS = ("court debtor creditor motion filed chapter bankruptcy trustee claim "
+         "hearing order plaintiff defendant settlement fraud alleged amount").split()
+COMPANIES = ["Acme Solar LLC", "Northwind Energy Inc", "Helios Partners Ltd"]
+
+
+def make_pdf(path, pages, words_per_page=450):
+    rng = random.Random(pages)
+    document = fitz.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        text = " ".join(rng.choice(WORDS) for _ in range(words_per_page))
+        text += f" {COMPANIES[page_number % len(COMPANIES)]}."
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=7)
+    document.save(path)
+    document.close()
+
+
+def fake_analysis(latency, per_1k_tokens):
+    def run_analysis_task(kind, text):
+        tokens = len(text.split()) / documents.WORDS_PER_TOKEN
+        time.sleep(latency + per_1k_tokens * tokens / 1000)
+        if kind == "public_company":
+            return "succeeded", "\n".join(c for c in COMPANIES if c in text)
+        return "succeeded", f"1. Bankruptcy indicators ({len(text)} chars reviewed)"
+    return run_analysis_task
+
+
+def baseline(file_path, run_analysis_task):
+    # The previous implementation: concatenate every page, then one model call.
+    document = fitz.open(file_path)
+    file_content = ""
+    for page in document:
+        file_content += page.get_text()
+    document.close()
+    return run_analysis_task("public_risk", file_content)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1048576, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 500, 2000])
+    parser.add_argument('--latency', type=float, default=0.2, help="fixed seconds per stand-in model call")
+    parser.add_argument('--per-1k-tokens', type=float, default=0.02, help="extra seconds per 1k prompt tokens")
+    args = parser.parse_args()
+    import main
+    main.run_analysis_task = fake_analysis(args.latency, args.per_1k_tokens)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in args.pages:
+            path = os.path.join(workdir, f"doc-{pages}.pdf")
+            make_pdf(path, pages)
+            results.append({
+                'pages': pages,
+                'baseline': measure(baseline, path, main.run_analysis_task),
+                'chunked_risk': measure(main.analyze_public_records, path, "risk_single"),
+                'chunked_company': measure(main.analyze_public_records, path, "company")
+            })
+    print(json.dumps({
+        'latency_s': args.latency,
+        'per_1k_tokens_s': args.per_1k_tokens,
+        'chunk_tokens': documents.CHUNK_TOKENS,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
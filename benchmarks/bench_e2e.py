@@ -0,0 +1,217 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end throughput and latency of /process, /public and /company, run
+through the real Flask app against the local fakes in benchmarks/fakes.py.
+Prints one JSON document (or writes it with --output) that can be diffed
+across commits.
+
+    python benchmarks/bench_e2e.py --scenarios process public company \
+        --concurrency 1 8 32 --requests 64 --output bench_output.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+WORKDIR = tempfile.mkdtemp(prefix="riskradar-bench-")
+# Keys and cache locations must be in place before main is imported.
+os.environ.update({
+    "ASSEMBLYAI_API_KEY": "fake",
+    "JULEP_API_KEY": "fake",
+    "SERPAPI_KEY": "fake",
+    "TRANSCRIPT_CACHE_DIR": os.path.join(WORKDIR, "transcripts"),
+    "NEWS_CACHE_DB": os.path.join(WORKDIR, "news.sqlite3"),
+    "JULEP_TASK_CACHE": os.path.join(WORKDIR, "julep_tasks.json"),
+    "JULEP_AGENT_CACHE": os.path.join(WORKDIR, "julep_agent.json"),
+    "REPORT_DB": os.path.join(WORKDIR, "reports.sqlite3"),
+    "MONITOR": "off",
+    # Streaming would resolve the URL with yt-dlp over the network; download_audio is stubbed instead.
+    "STREAM_AUDIO": "off",
+    # Measure the pipeline, not the provider rate limits (bench_ratelimit.py covers those).
+    "ASSEMBLYAI_RATE_LIMIT": "0",
+    "SERPAPI_RATE_LIMIT": "0",
+    "JULEP_RATE_LIMIT": "0",
+    "ASSEMBLYAI_MAX_CONCURRENCY": "1000",
+    "SERPAPI_MAX_CONCURRENCY": "1000",
+    "JULEP_MAX_CONCURRENCY": "1000",
+})
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fakes import FakeAPIServer, FakeJulep, TRANSCRIPT_TEXT
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 4)
+
+
+def install_fakes(args, fake_api):
+    import main
+    import app
+    from jobs import JobManager
+    main.UPLOAD_URL = f"{fake_api.base_url}/v2/upload"
+    main.TRANSCRIPT_URL = f"{fake_api.base_url}/v2/transcript"
+    main.SERPAPI_URL = f"{fake_api.base_url}/search.json"
+    main._julep_client = FakeJulep(latency=args.julep_latency, error_rate=args.error_rate)
+    main.get_video_id = lambda url: None
+
+    def download_audio(url, output_dir):
+        # Random bytes so each job misses the transcript cache unless --cache is given.
+        audio_filename = os.path.join(output_dir, "audio.m4a")
+        seed = url if args.cache else f"{url}-{random.random()}"
+        with open(audio_filename, "wb") as f:
+            f.write(random.Random(seed).randbytes(args.audio_kb * 1024))
+        return audio_filename
+    main.download_audio = download_audio
+    if not args.cache:
+        main.news_cache.ttl = 0
+    app.job_manager = JobManager(workers=args.job_workers, queue_size=args.job_queue)
+    return app
+
+
+def run_process(session, base_url, i):
+    while True:
+        response = session.post(f"{base_url}/process", data={"url": f"https://www.tiktok.com/@bench/video/{i}"})
+        if response.status_code != 503:
+            break
+        time.sleep(0.05)
+    if response.status_code != 202:
+        return False
+    job_id = response.json()["job_id"]
+    while True:
+        job = session.get(f"{base_url}/jobs/{job_id}").json()
+        if job["status"] == "completed":
+            return True
+        if job["status"] == "error":
+            return False
+        time.sleep(0.02)
+
+
+def run_public(session, base_url, i, document):
+    with open(document, "rb") as f:
+        response = session.post(f"{base_url}/public", data={"analysisType": "risk_single"},
+                                files={"file": (f"record-{i}.txt", f)})
+    return response.status_code == 200 and bool(response.json().get("risk_report"))
+
+
+def run_company(session, base_url, i, companies):
+    names = [f"Counterparty {i}-{n}" for n in range(companies)]
+    response = session.post(f"{base_url}/company", json={"companies": names})
+    return response.status_code == 200 and len(response.json().get("risk_reports", [])) == companies
+
+
+def run_scenario(name, fn, concurrency, total):
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = fn(local.session, i)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for ok, latency in outcomes if ok]
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': total - len(latencies),
+        'p50_s': percentile(latencies, 50),
+        'p95_s': percentile(latencies, 95),
+        'p99_s': percentile(latencies, 99),
+        'jobs_per_s': round(len(latencies) / elapsed, 3),
+        'wall_s': round(elapsed, 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=['process', 'public', 'company'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=32, help="requests per scenario and concurrency level")
+    parser.add_argument('--api-latency', type=float, default=0.02, help="seconds per fake AssemblyAI/SerpAPI call")
+    parser.add_argument('--transcript-seconds', type=float, default=1.0)
+    parser.add_argument('--julep-latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--audio-kb', type=int, default=256)
+    parser.add_argument('--document-kb', type=int, default=64)
+    parser.add_argument('--companies', type=int, default=5, help="companies per /company request")
+    parser.add_argument('--job-workers', type=int, default=int(os.getenv("JOB_WORKERS", 4)))
+    parser.add_argument('--job-queue', type=int, default=int(os.getenv("JOB_QUEUE_SIZE", 32)))
+    parser.add_argument('--cache', action='store_true', help="let repeat inputs hit the transcript and news caches")
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    fake_api = FakeAPIServer(latency=args.api_latency, error_rate=args.error_rate,
+                             transcript_seconds=args.transcript_seconds).start()
+    app = install_fakes(args, fake_api)
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    document = os.path.join(WORKDIR, "record.txt")
+    with open(document, "w", encoding="utf-8") as f:
+        while f.tell() < args.document_kb * 1024:
+            f.write(TRANSCRIPT_TEXT + "\n")
+
+    scenarios = {
+        'process': lambda session, i: run_process(session, base_url, i),
+        'public': lambda session, i: run_public(session, base_url, i, document),
+        'company': lambda session, i: run_company(session, base_url, i, args.companies),
+    }
+    results = []
+    for name in args.scenarios:
+        for concurrency in args.concurrency:
+            results.append(run_scenario(name, scenarios[name], concurrency, args.requests))
+            print(f"{name} x{concurrency}: {results[-1]}", file=sys.stderr)
+    server.shutdown()
+    fake_api.stop()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'params': vars(args),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'upstream_requests': fake_api.requests,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
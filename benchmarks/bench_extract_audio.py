@@ -0,0 +1,61 @@
+# benchmarks/bench_extract_audio.py
+"""
+Compare the MoviePy decode/re-encode path of extract_audio with the fast
+stream-copy path on a synthetic clip.
+
+    python benchmarks/bench_extract_audio.py --seconds 60 --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import extract_audio, get_ffmpeg_exe
+
+
+def make_clip(path, seconds):
+    command = [get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+               '-f', 'lavfi', '-i', 'testsrc=size=640x360:rate=30',
+               '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+               '-t', str(seconds), '-c:v', 'libx264', '-preset', 'ultrafast',
+               '-c:a', 'aac', '-shortest', path]
+    subprocess.run(command, check=True)
+
+
+def run(mode, video_file, workdir, runs):
+    timings = []
+    bytes_written = 0
+    for i in range(runs):
+        audio_filename = os.path.join(workdir, f"{mode}-{i}.mp3")
+        start = time.perf_counter()
+        output = extract_audio(video_file, audio_filename, mode=mode)
+        timings.append(time.perf_counter() - start)
+        if not output:
+            raise Exception(f"{mode} extraction failed")
+        bytes_written = os.path.getsize(output)
+    return {
+        'mode': mode,
+        'best_s': round(min(timings), 3),
+        'mean_s': round(sum(timings) / len(timings), 3),
+        'bytes_written': bytes_written
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        video_file = os.path.join(workdir, 'clip.mp4')
+        make_clip(video_file, args.seconds)
+        results = [run(mode, video_file, workdir, args.runs) for mode in ('moviepy', 'fast')]
+    print(json.dumps({'clip_seconds': args.seconds, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_ingest.py
+"""
+Encoding detection and decoding of large plain-text and CSV public records.
+Compares the old approach (chardet over every byte, then a second full read)
+with sampled detection plus block-by-block decoding into chunk_pages.
+
+    python benchmarks/bench_ingest.py --sizes-mb 10 100
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from documents import iter_pages, chunk_pages
+
+WORDS = ("court debtor creditor motion filed chapter bankruptcy trustee claim hearing "
+         "Société Générale Müller café résumé settlement fraud alleged").split()
+
+
+def make_text(path, size, encoding):
+    rng = random.Random(size)
+    with open(path, 'w', encoding=encoding) as f:
+        while f.tell() < size:
+            f.write(" ".join(rng.choice(WORDS) for _ in range(20)) + "\n")
+
+
+def make_csv(path, size, encoding):
+    rng = random.Random(size)
+    with open(path, 'w', encoding=encoding) as f:
+        f.write("case_id,filed,party,claim,notes\n")
+        case_id = 0
+        while f.tell() < size:
+            case_id += 1
+            f.write(f"{case_id},2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+                    f"{rng.choice(WORDS)} {rng.choice(WORDS)},{rng.randint(1000, 9999999)},"
+                    f"\"{' '.join(rng.choice(WORDS) for _ in range(8))}\"\n")
+
+
+def baseline(file_path):
+    # The previous implementation of analyze_public_records for non-PDF files.
+    import chardet
+    with open(file_path, 'rb') as f:
+        raw_data = f.read()
+        encoding = chardet.detect(raw_data)['encoding']
+    with open(file_path, 'r', encoding=encoding) as f:
+        file_content = f.read()
+    return len(file_content)
+
+
+def streamed(file_path):
+    return sum(len(text) for _, text in iter_pages(file_path))
+
+
+def streamed_chunks(file_path):
+    return sum(1 for _ in chunk_pages(iter_pages(file_path)))
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1048576, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--encoding', default='latin-1')
+    parser.add_argument('--skip-baseline', action='store_true', help="chardet over 100 MB can take minutes")
+    args = parser.parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in args.sizes_mb:
+            for kind, make in (('text', make_text), ('csv', make_csv)):
+                path = os.path.join(workdir, f"record-{size_mb}.{'txt' if kind == 'text' else 'csv'}")
+                make(path, size_mb * 1048576, args.encoding)
+                result = {
+                    'kind': kind,
+                    'size_mb': size_mb,
+                    'streamed': measure(streamed, path),
+                    'streamed_into_chunks': measure(streamed_chunks, path)
+                }
+                if not args.skip_baseline:
+                    result['baseline'] = measure(baseline, path)
+                results.append(result)
+                os.remove(path)
+    print(json.dumps({'encoding': args.encoding, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_monitor.py
+"""
+Watchlist monitoring against the fake news source in benchmarks/fakes.py.
+
+Watches --companies companies, runs a first sweep (every article is new),
+then --cycles more sweeps with news_epoch advanced before each so that a
+--churn fraction of companies gets a new article. Reports SerpAPI and Julep
+calls per sweep next to what re-analyzing every search result would cost.
+
+    python benchmarks/bench_monitor.py --companies 5000 --max-searches 5000 --cycles 3 --churn 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+WORKDIR = tempfile.mkdtemp(prefix="riskradar-monitor-")
+os.environ.update({
+    "SERPAPI_KEY": "fake",
+    "JULEP_API_KEY": "fake",
+    "NEWS_CACHE_DB": os.path.join(WORKDIR, "news.sqlite3"),
+    "JULEP_TASK_CACHE": os.path.join(WORKDIR, "julep_tasks.json"),
+    "JULEP_AGENT_CACHE": os.path.join(WORKDIR, "julep_agent.json"),
+    "REPORT_DB": os.path.join(WORKDIR, "reports.sqlite3"),
+    "MONITOR": "off",
+    # Measure the pipeline, not the provider rate limits (bench_ratelimit.py covers those).
+    "ASSEMBLYAI_RATE_LIMIT": "0",
+    "SERPAPI_RATE_LIMIT": "0",
+    "JULEP_RATE_LIMIT": "0",
+    "ASSEMBLYAI_MAX_CONCURRENCY": "1000",
+    "SERPAPI_MAX_CONCURRENCY": "1000",
+    "JULEP_MAX_CONCURRENCY": "1000",
+})
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fakes import FakeAPIServer, FakeJulep
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=2000)
+    parser.add_argument('--max-searches', type=int, default=2000, help="MONITOR_MAX_SEARCHES")
+    parser.add_argument('--workers', type=int, default=16, help="MONITOR_WORKERS")
+    parser.add_argument('--cycles', type=int, default=3, help="sweeps after the first")
+    parser.add_argument('--churn', type=float, default=0.05, help="fraction of companies with news per cycle")
+    parser.add_argument('--news-results', type=int, default=10, help="articles per search result")
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--julep-latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    import main
+    from monitor import Monitor, WatchlistStore, AlertSink
+    fake_api = FakeAPIServer(latency=args.api_latency, news_results=args.news_results,
+                             news_churn=args.churn).start()
+    julep = FakeJulep(latency=args.julep_latency)
+    main.SERPAPI_URL = f"{fake_api.base_url}/search.json"
+    main._julep_client = julep
+
+    store = WatchlistStore(os.path.join(WORKDIR, "monitor.sqlite3"))
+    # interval=0 makes every company due each sweep, leaving max_searches as the only limit.
+    monitor = Monitor(store, AlertSink(os.path.join(WORKDIR, "alerts.jsonl")), interval=0,
+                      max_searches=args.max_searches, workers=args.workers)
+    store.add([f"Counterparty {i} Holdings" for i in range(args.companies)])
+
+    sweeps = []
+    for cycle in range(args.cycles + 1):
+        if cycle:
+            fake_api.news_epoch += 1
+        searches_before = fake_api.requests
+        executions_before = len(julep._executions)
+        summary = monitor.sweep()
+        searches = fake_api.requests - searches_before
+        sweeps.append({
+            'cycle': cycle,
+            'checked': summary['due'],
+            'serpapi_calls': searches,
+            'julep_executions': len(julep._executions) - executions_before,
+            'julep_executions_full_reanalysis': summary['due'] - summary['errors'],
+            'new_articles': summary['new_articles'],
+            'articles_returned': searches * args.news_results,
+            'alerts': summary['alerts'],
+            'errors': summary['errors'],
+            'seconds': summary['seconds'],
+            'companies_per_s': round(summary['due'] / summary['seconds'], 1) if summary['seconds'] else None
+        })
+        print(f"cycle {cycle}: {sweeps[-1]}", file=sys.stderr)
+    fake_api.stop()
+    print(json.dumps({'params': vars(args), 'sweeps': sweeps}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
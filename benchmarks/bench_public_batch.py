@@ -0,0 +1,94 @@
+# benchmarks/bench_public_batch.py
+"""
+Multi-document public-record analysis on synthetic PDFs.
+
+extract: text extraction and chunking of every document, in the request
+thread (the old path) and in the process pool at each --workers size.
+batch: the whole analyze_public_batch call against a fixed-latency stand-in
+for Julep, compared with analyzing the same documents one after another
+through analyze_public_records.
+
+    python benchmarks/bench_public_batch.py --documents 32 --pages 40 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import documents
+from bench_documents import make_pdf, fake_analysis
+
+
+def bench_extract(paths, workers):
+    results = []
+    start = time.perf_counter()
+    for path in paths:
+        documents.extract_chunks(path)
+    serial = time.perf_counter() - start
+    results.append({'mode': 'request_thread', 'workers': 1, 'seconds': round(serial, 3), 'speedup': 1.0})
+    for count in workers:
+        with ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Start the workers first so spawn time is not counted, as in a long-running app.
+            list(pool.map(abs, range(count)))
+            start = time.perf_counter()
+            list(pool.map(documents.extract_chunks, paths))
+            elapsed = time.perf_counter() - start
+        results.append({'mode': 'process_pool', 'workers': count, 'seconds': round(elapsed, 3),
+                        'speedup': round(serial / elapsed, 2)})
+    return results
+
+
+def bench_batch(paths, args):
+    import main
+    main.run_analysis_task = fake_analysis(args.latency, args.per_1k_tokens)
+    main.DOC_EXTRACT_WORKERS = max(args.workers)
+    named = [(os.path.basename(path), path) for path in paths]
+    main.analyze_public_batch(named[:1], analysis=args.analysis)  # start the pool
+
+    start = time.perf_counter()
+    for name, path in named:
+        main.analyze_public_records(path, analysis=args.analysis)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main.analyze_public_batch(named, analysis=args.analysis)
+    batch = time.perf_counter() - start
+    return {'one_by_one_s': round(one_by_one, 3), 'batch_s': round(batch, 3),
+            'speedup': round(one_by_one / batch, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=32)
+    parser.add_argument('--pages', type=int, default=40, help="pages per document")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per stand-in Julep call")
+    parser.add_argument('--per-1k-tokens', type=float, default=0.02)
+    parser.add_argument('--analysis', default="company", choices=["company", "risk_single"])
+    parser.add_argument('--skip-batch', action='store_true', help="only measure the extraction phase")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = []
+        for i in range(args.documents):
+            path = os.path.join(workdir, f"filing-{i}.pdf")
+            make_pdf(path, args.pages)
+            paths.append(path)
+        report = {
+            'params': vars(args),
+            'cpu_count': os.cpu_count(),
+            'extract': bench_extract(paths, args.workers)
+        }
+        if not args.skip_batch:
+            report['batch'] = bench_batch(paths, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_ratelimit.py
+"""
+News searches against a fake SerpAPI that answers 429 above --server-rate
+requests per second, with --threads callers searching at once.
+
+Runs the same --searches three ways: with no client-side limit and no
+retries (the old behaviour), with retries but no limit, and through the
+shared limiter at --client-rate. Half the callers run in the batch lane, so
+the last run also shows interactive searches overtaking batch ones.
+
+    python benchmarks/bench_ratelimit.py --searches 400 --threads 64 --server-rate 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SERPAPI_KEY", "fake")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_e2e import percentile
+from fakes import FakeAPIServer
+
+
+def run(args, fake_api, rate, concurrency, retries):
+    import main
+    import ratelimit
+    limiter = ratelimit.limiters["serpapi"]
+    limiter.rate, limiter.burst, limiter.concurrency = rate, max(1.0, rate), concurrency
+    ratelimit.API_MAX_RETRIES = retries
+    requests_before, throttled_before = fake_api.requests, fake_api.throttled
+    latencies = {"interactive": [], "batch": []}
+    failed = [0]
+    lock = threading.Lock()
+
+    def search(i):
+        lane_name = "batch" if i % 2 else "interactive"
+        start = time.perf_counter()
+        with ratelimit.lane(lane_name):
+            data = main.fetch_company_news(f'"Counterparty {i} Holdings" bankruptcy')
+        with lock:
+            if data is None:
+                failed[0] += 1
+            else:
+                latencies[lane_name].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(search, range(args.searches)))
+    seconds = time.perf_counter() - start
+    succeeded = args.searches - failed[0]
+    return {
+        'seconds': round(seconds, 2),
+        'succeeded': succeeded,
+        'failed': failed[0],
+        'succeeded_per_s': round(succeeded / seconds, 1),
+        'requests_sent': fake_api.requests - requests_before,
+        'answered_429': fake_api.throttled - throttled_before,
+        'latency_p50_s': {lane: percentile(values, 50) for lane, values in latencies.items()},
+        'latency_p95_s': {lane: percentile(values, 95) for lane, values in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--searches', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--server-rate', type=float, default=20, help="requests/s the fake accepts")
+    parser.add_argument('--client-rate', type=float, default=None, help="SERPAPI_RATE_LIMIT (default: server rate)")
+    parser.add_argument('--concurrency', type=int, default=8, help="SERPAPI_MAX_CONCURRENCY")
+    parser.add_argument('--retries', type=int, default=4, help="API_MAX_RETRIES")
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    import main
+    fake_api = FakeAPIServer(latency=args.api_latency, news_results=5, rate_limit=args.server_rate).start()
+    main.SERPAPI_URL = f"{fake_api.base_url}/search.json"
+    report = {'params': vars(args)}
+    for name, rate, concurrency, retries in (
+        ("no_limit_no_retry", 0, args.threads, 0),
+        ("retry_only", 0, args.threads, args.retries),
+        ("limiter_and_retry", args.client_rate or args.server_rate, args.concurrency, args.retries),
+    ):
+        # Let the fake's bucket refill so every run starts from the same state.
+        time.sleep(2)
+        report[name] = run(args, fake_api, rate, concurrency, retries)
+        print(f"{name}: {report[name]}", file=sys.stderr)
+    fake_api.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
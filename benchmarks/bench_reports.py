@@ -0,0 +1,90 @@
+# benchmarks/bench_reports.py
+"""
+Write throughput and query latency of the report store at scale.
+
+Fills a fresh store with --records synthetic transcripts, news bundles and
+risk reports spread over --companies companies, then times full-text
+searches for common and rare terms, latest-report lookups and a compaction
+that drops the older half under a retention limit.
+
+    python benchmarks/bench_reports.py --records 300000 --companies 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_e2e import percentile
+from reports import ReportStore
+
+WORDS = ("court debtor creditor motion filed chapter bankruptcy trustee claim hearing order plaintiff "
+         "defendant settlement alleged amount project delay contract payment supplier market shares "
+         "revenue quarter guidance layoffs regulator investigation fine penalty audit").split()
+RARE = "whistleblower"
+
+
+def timed(fn, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {f'p{pct}_ms': percentile(latencies, pct) for pct in (50, 95, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--companies', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=150, help="words per record")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    companies = [f"Counterparty {i} Holdings LLC" for i in range(args.companies)]
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ReportStore(os.path.join(workdir, "reports.sqlite3"), compact_interval=10 ** 9)
+        start = time.perf_counter()
+        for i in range(args.records):
+            company = rng.choice(companies)
+            words = [rng.choice(WORDS) for _ in range(args.words)]
+            if rng.random() < 0.001:
+                words[rng.randrange(len(words))] = RARE
+            kind = ("transcript", "news", "risk_report")[i % 3]
+            store.put(kind, f"{company}: " + " ".join(words), company=None if kind == "transcript" else company,
+                      source=f"https://www.tiktok.com/@bench/video/{i}" if kind == "transcript" else None)
+        insert_s = time.perf_counter() - start
+        # Age the first half so the retention pass below has something to drop.
+        with store._lock:
+            store._conn.execute("UPDATE reports SET updated = updated - 86400 * 10 WHERE id <= ?",
+                                (args.records // 2,))
+            store._conn.commit()
+
+        report = {
+            'params': vars(args),
+            'insert_per_s': round(args.records / insert_s, 1),
+            'size_mb': store.stats()['size_mb'],
+            'search_common_term': timed(store.search, [(rng.choice(WORDS),) for _ in range(args.queries)]),
+            'search_two_terms': timed(store.search, [(f"{rng.choice(WORDS)} {rng.choice(WORDS)}",)
+                                                     for _ in range(args.queries)]),
+            'search_rare_term': timed(store.search, [(RARE,)] * args.queries),
+            'search_term_for_company': timed(lambda term, company: store.search(term, company=company),
+                                             [(rng.choice(WORDS), rng.choice(companies))
+                                              for _ in range(args.queries)]),
+            'latest_for_company': timed(lambda company: store.latest(company=company),
+                                        [(rng.choice(companies),) for _ in range(args.queries)]),
+        }
+        start = time.perf_counter()
+        report['compact_removed'] = store.compact(retention_days=5)
+        report['compact_s'] = round(time.perf_counter() - start, 3)
+        report['size_after_compact_mb'] = store.stats()['size_mb']
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
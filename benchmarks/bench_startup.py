@@ -0,0 +1,75 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost of importing the app: wall time over several fresh
+interpreters plus the slowest modules from `python -X importtime`.
+Runs with the API keys blanked out, so it also proves the import is
+offline and side-effect free.
+
+    python benchmarks/bench_startup.py --module app --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_env():
+    env = dict(os.environ)
+    for name in ("ASSEMBLYAI_API_KEY", "JULEP_API_KEY", "SERPAPI_KEY"):
+        env[name] = ""
+    return env
+
+
+def wall_time(module, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, env=child_env(),
+                       check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_breakdown(module, top):
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                               env=child_env(), check=True, capture_output=True, text=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # importtime indents nested imports by two spaces per level.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({
+            'module': name.strip(),
+            'depth': depth,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    # The target itself and the modules it imports directly show where the time goes.
+    rows = [row for row in rows if row['depth'] <= 1]
+    rows.sort(key=lambda row: -row['cumulative_ms'])
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    timings = wall_time(args.module, args.runs)
+    print(json.dumps({
+        'module': args.module,
+        'wall_best_s': round(min(timings), 3),
+        'wall_mean_s': round(sum(timings) / len(timings), 3),
+        'slowest_imports': import_breakdown(args.module, args.top)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_streams.py
+"""
+Job progress over server-sent events, with --jobs /process jobs each watched
+by its own stream, run once against the Flask route and once against the
+asyncio stream server (STREAM_PORT).
+
+Reports time from a job being accepted to its first stage event, its transcript
+and its "done" event next to the latency polling /jobs/<id> every
+--poll-interval seconds would add, and the peak number of request threads
+the app held open. The client is a single asyncio thread so it does not add
+threads of its own.
+
+    python benchmarks/bench_streams.py --jobs 300 --job-workers 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_e2e import install_fakes, percentile
+from fakes import FakeAPIServer
+
+
+async def http_request(port, head, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+    return reader, writer
+
+
+async def submit(port, i):
+    body = urlencode({"url": f"https://www.tiktok.com/@bench/video/{i}"}).encode()
+    reader, writer = await http_request(port, "POST /process HTTP/1.0\r\nHost: 127.0.0.1\r\n"
+                                        "Content-Type: application/x-www-form-urlencoded\r\n"
+                                        f"Content-Length: {len(body)}\r\n\r\n", body)
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])["job_id"]
+
+
+async def watch(app_port, stream_port, i, submitting):
+    """Submit one job and follow its stream; returns seconds from acceptance to each first event of a kind."""
+    # Few submissions at once, so request threads left open are the streams' and not the POSTs'.
+    async with submitting:
+        job_id = await submit(app_port, i)
+    start = time.perf_counter()
+    reader, writer = await http_request(stream_port or app_port,
+                                        f"GET /jobs/{job_id}/events HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n")
+    seen = {}
+    async for line in reader:
+        if line.startswith(b"event: "):
+            event = line[7:].strip().decode()
+            seen.setdefault(event, time.perf_counter() - start)
+            if event == "done":
+                break
+    writer.close()
+    return seen
+
+
+def run(args, app_port, stream_port):
+    peak = [0]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.is_set():
+            held = sum(1 for t in threading.enumerate() if "process_request_thread" in t.name)
+            peak[0] = max(peak[0], held)
+            time.sleep(0.02)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    async def all_jobs():
+        submitting = asyncio.Semaphore(4)
+        return await asyncio.gather(*(watch(app_port, stream_port, i, submitting) for i in range(args.jobs)))
+    start = time.perf_counter()
+    timings = asyncio.run(all_jobs())
+    seconds = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    def summary(event):
+        values = [t[event] for t in timings if event in t]
+        return {'p50_s': percentile(values, 50), 'p95_s': percentile(values, 95)}
+    done = [t['done'] for t in timings if 'done' in t]
+    # A poller sees completion on average half an interval late, plus the round trip.
+    polled = [d + args.poll_interval / 2 for d in done]
+    return {
+        'seconds': round(seconds, 2),
+        'completed': len(done),
+        'peak_request_threads': peak[0],
+        'first_stage': summary('stage'),
+        'first_transcript': summary('transcript'),
+        'first_risk_item': summary('risk'),
+        'done': summary('done'),
+        'result_when_polling': {'p50_s': percentile(polled, 50), 'p95_s': percentile(polled, 95)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=300)
+    parser.add_argument('--job-workers', type=int, default=32)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--transcript-seconds', type=float, default=1.0)
+    parser.add_argument('--julep-latency', type=float, default=0.5)
+    parser.add_argument('--audio-kb', type=int, default=64)
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="media.html's old polling interval")
+    args = parser.parse_args()
+    args.job_queue = args.jobs
+    args.error_rate = 0.0
+    args.cache = False
+
+    from werkzeug.serving import make_server
+    from streams import EventStreamServer
+    fake_api = FakeAPIServer(latency=args.api_latency, transcript_seconds=args.transcript_seconds).start()
+    app = install_fakes(args, fake_api)
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stream_server = EventStreamServer(app.job_manager, port=0, host="127.0.0.1").start()
+
+    report = {'params': vars(args)}
+    for name, stream_port in (("flask_route", None), ("stream_server", stream_server.port)):
+        report[name] = run(args, server.server_port, stream_port)
+        print(f"{name}: {report[name]}", file=sys.stderr)
+    server.shutdown()
+    fake_api.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for the paid APIs, for benchmarks only.
+
+FakeAPIServer speaks enough of AssemblyAI (/v2/upload, /v2/transcript) and
+SerpAPI (/search.json) for main.py, and FakeJulep mimics the agents / tasks /
+executions calls. Every call can be given a latency and an error rate, and
+FakeAPIServer can enforce a rate limit, answering 429 above rate_limit
+requests per second like the real providers do.
+Advancing FakeAPIServer.news_epoch publishes new articles for a news_churn
+fraction of companies, as a stand-in for time passing between sweeps.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+TRANSCRIPT_TEXT = (
+    "Hey everyone, quick update on the solar farm deal. "
+    "The developer is facing a lawsuit from two landowners and there are rumours of a bankruptcy filing. "
+    "Otherwise the project is on schedule and the panels arrive next month."
+)
+
+
+class FakeAPIServer:
+    def __init__(self, latency=0.02, error_rate=0.0, transcript_seconds=1.0, news_results=10, news_churn=0.0,
+                 rate_limit=0, retry_after=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.throttled = 0
+        self._allowance = rate_limit
+        self._allowance_at = time.monotonic()
+        self.transcript_seconds = transcript_seconds
+        self.news_results = news_results
+        self.news_churn = news_churn
+        self.news_epoch = 0
+        self.requests = 0
+        self._transcripts = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def published(self, company):
+        """Articles published about company so far: news_results at first, plus one per epoch it had news."""
+        count = self.news_results
+        for epoch in range(1, self.news_epoch + 1):
+            if random.Random(f"{company}:{epoch}").random() < self.news_churn:
+                count += 1
+        return count
+
+    def _admit(self):
+        """Token bucket of rate_limit requests per second with one second of burst; False means answer 429."""
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_at) * self.rate_limit)
+            self._allowance_at = now
+            if self._allowance < 1:
+                self.throttled += 1
+                return False
+            self._allowance -= 1
+            return True
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    size = 0
+                    while True:
+                        length = int(self.rfile.readline().split(b";")[0], 16)
+                        if length == 0:
+                            self.rfile.readline()
+                            return size
+                        self.rfile.read(length)
+                        self.rfile.readline()
+                        size += length
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                return length
+
+            def _reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _simulate(self):
+                with fake._lock:
+                    fake.requests += 1
+                if not fake._admit():
+                    headers = {"Retry-After": str(fake.retry_after)} if fake.retry_after else None
+                    self._reply(429, {"error": "rate limit exceeded"}, headers)
+                    return False
+                time.sleep(fake.latency)
+                if random.random() < fake.error_rate:
+                    self._reply(500, {"error": "injected failure"})
+                    return False
+                return True
+
+            def do_POST(self):
+                path = urlsplit(self.path).path
+                if path == "/v2/upload":
+                    self._read_body()
+                    if self._simulate():
+                        self._reply(200, {"upload_url": f"{fake.base_url}/files/{next(fake._ids)}"})
+                elif path == "/v2/transcript":
+                    self._read_body()
+                    if self._simulate():
+                        transcript_id = str(next(fake._ids))
+                        with fake._lock:
+                            fake._transcripts[transcript_id] = time.monotonic() + fake.transcript_seconds
+                        self._reply(200, {"id": transcript_id, "status": "queued"})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/v2/transcript/"):
+                    if not self._simulate():
+                        return
+                    transcript_id = parts.path.rsplit("/", 1)[1]
+                    with fake._lock:
+                        ready_at = fake._transcripts.get(transcript_id)
+                    if ready_at is None:
+                        self._reply(404, {"error": "unknown transcript"})
+                    elif time.monotonic() < ready_at:
+                        self._reply(200, {"id": transcript_id, "status": "processing"})
+                    else:
+                        self._reply(200, {"id": transcript_id, "status": "completed", "text": TRANSCRIPT_TEXT})
+                elif parts.path == "/search.json":
+                    if not self._simulate():
+                        return
+                    query = parse_qs(parts.query).get("q", [""])[0]
+                    company = query.split('"')[1] if '"' in query else query
+                    slug = company.lower().replace(" ", "-")
+                    latest = fake.published(company)
+                    # Newest first, like Google News; older articles drop off the end.
+                    self._reply(200, {"news_results": [
+                        {
+                            "title": f"{company} faces lawsuit over project delays ({i})",
+                            "link": f"https://news.example.com/{slug}/{i}",
+                            "date": "01/01/2026",
+                            "source": {"name": "Example News"}
+                        }
+                        for i in range(latest - 1, latest - 1 - fake.news_results, -1)
+                    ]})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+        return Handler
+
+
+class FakeJulep:
+    """Drop-in for the Julep client: executions succeed after `latency` seconds."""
+    def __init__(self, latency=0.5, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._ids = itertools.count(1)
+        self._executions = {}
+        self._lock = threading.Lock()
+        self.agents = types.SimpleNamespace(create=self._create)
+        self.tasks = types.SimpleNamespace(create=self._create)
+        self.executions = types.SimpleNamespace(create=self._create_execution, get=self._get_execution)
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        return types.SimpleNamespace(id=f"fake-{next(self._ids)}")
+
+    def _create_execution(self, task_id, input):
+        execution_id = f"exec-{next(self._ids)}"
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.calls += 1
+            self._executions[execution_id] = (time.monotonic() + self.latency, failed, len(input.get("text", "")))
+        return types.SimpleNamespace(id=execution_id)
+
+    def _get_execution(self, execution_id):
+        with self._lock:
+            self.calls += 1
+            ready_at, failed, size = self._executions[execution_id]
+        if time.monotonic() < ready_at:
+            return types.SimpleNamespace(status="running", output=None, error=None)
+        if failed:
+            return types.SimpleNamespace(status="failed", output=None, error="injected failure")
+        report = f"1. Lawsuit - litigation risk noted in {size} characters of input.\n2. Bankruptcy - possible filing."
+        return types.SimpleNamespace(status="succeeded", error=None,
+                                     output={"choices": [{"message": {"content": report}}]})
@@ -0,0 +1,337 @@
+# companies.py
+"""
+Local company-name extraction for public records.
+
+    python companies.py build gazetteer.csv cache/companies.idx
+    python companies.py extract filing.txt
+
+Candidates come from two sources: legal suffixes (Inc, LLC, GmbH, ...) with
+the capitalized words in front of them, and an optional gazetteer of known
+companies and their aliases. The gazetteer is a prebuilt sorted index read
+through mmap, so opening it costs nothing and lookups only touch the pages
+they need.
+"""
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+
+# "llm" has the model read every window. "local" never calls the model for
+# company extraction, and "hybrid" only asks it to confirm low-confidence
+# candidates (reading the text itself when no candidates are found). Both
+# miss companies with no legal suffix that are not in the gazetteer, so they
+# are opt-in.
+COMPANY_EXTRACTOR = os.getenv("COMPANY_EXTRACTOR", "llm")
+# Candidates scoring below this are dropped ("local") or confirmed by the model ("hybrid").
+COMPANY_CONFIDENCE = float(os.getenv("COMPANY_CONFIDENCE", 0.7))
+# Index built with `python companies.py build`; unset uses legal suffixes only.
+COMPANY_GAZETTEER = os.getenv("COMPANY_GAZETTEER")
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "lllp", "lp", "pllc", "pc", "ltd", "limited", "corp",
+    "corporation", "co", "company", "plc", "gmbh", "ag", "kg", "sa", "sas", "sarl", "spa", "srl",
+    "nv", "bv", "pty", "pte", "oy", "ab", "kk", "lda"
+}
+# Capitalized words that start a sentence or introduce a party rather than belong to its name.
+LEADING_STOPWORDS = {
+    "the", "a", "an", "and", "of", "by", "between", "against", "v", "vs", "with", "from", "to",
+    "for", "in", "on", "at", "as", "that", "this", "plaintiff", "plaintiffs", "defendant",
+    "defendants", "debtor", "debtors", "creditor", "creditors", "petitioner", "respondent",
+    "appellant", "appellee", "claimant", "movant", "trustee", "whereas", "re"
+}
+# Suffixes written with a period ("Inc."); after any other word a period ends the sentence.
+ABBREVIATED_SUFFIXES = {"inc", "corp", "co", "ltd", "pty", "pte"}
+# Words that can join the parts of one name. "and" is not one of them: "Microsoft and Oracle
+# Corporation" names two companies.
+CONNECTORS = {"&", "of", "de"}
+MAX_NAME_TOKENS = 6
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9&][A-Za-z0-9&.'’-]*")
+INDEX_MAGIC = b"RRGAZ1\0\0"
+
+
+def normalize_name(name):
+    """Matching key of a company name: case-folded words, punctuation and legal suffixes removed."""
+    words = re.sub(r"[^a-z0-9&]+", " ", re.sub(r"[.'’]", "", name.casefold())).split()
+    # "Acme & Co." and "Acme and Company" both come down to "acme".
+    while len(words) > 1 and (words[-1] in LEGAL_SUFFIXES or words[-1] in ("&", "and")):
+        words.pop()
+    return " ".join(words)
+
+
+def _normalize_token(token):
+    return re.sub(r"[^a-z0-9&]+", " ", re.sub(r"[.'’]", "", token.casefold())).strip()
+
+
+def build_gazetteer(source_path, index_path):
+    """
+    Build an index from a CSV whose rows are `canonical name, alias, alias, ...`.
+    Layout: magic, entry count, one uint64 offset per entry in key order, then
+    `key<TAB>canonical<LF>` records. Returns the number of entries.
+    """
+    entries = {}
+    with open(source_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            names = [name.strip() for name in row if name.strip()]
+            if not names or names[0].startswith('#'):
+                continue
+            for name in names:
+                key = normalize_name(name)
+                if key:
+                    entries.setdefault(key.encode('utf-8'), names[0].encode('utf-8'))
+    keys = sorted(entries)
+    offsets = []
+    records = bytearray()
+    for key in keys:
+        offsets.append(len(records))
+        records += key + b"\t" + entries[key] + b"\n"
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(index_path, 'wb') as f:
+        f.write(INDEX_MAGIC)
+        f.write(struct.pack("<Q", len(keys)))
+        f.write(struct.pack(f"<{len(keys)}Q", *offsets))
+        f.write(records)
+    return len(keys)
+
+
+class Gazetteer:
+    """
+    Read-only view of an index written by build_gazetteer. Keys are searched
+    by binary search over the offset table, straight from the mapped file.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a company gazetteer index")
+        self.size = struct.unpack_from("<Q", self._map, 8)[0]
+        self._records = 16 + 8 * self.size
+
+    def _entry(self, index):
+        start = self._records + struct.unpack_from("<Q", self._map, 16 + 8 * index)[0]
+        end = self._map.find(b"\n", start)
+        key, canonical = self._map[start:end].split(b"\t", 1)
+        return key, canonical
+
+    def _key(self, index):
+        start = self._records + struct.unpack_from("<Q", self._map, 16 + 8 * index)[0]
+        return self._map[start:self._map.find(b"\t", start)]
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, key):
+        """
+        Returns (canonical, is_prefix) for a normalized key: the canonical name
+        if key is in the index, and whether any longer entry starts with key.
+        """
+        key = key.encode('utf-8')
+        index = self._lower_bound(key)
+        canonical = None
+        if index < self.size:
+            found, value = self._entry(index)
+            if found == key:
+                canonical = value.decode('utf-8')
+                index += 1
+        # A space sorts before every other key character, so longer entries follow directly.
+        is_prefix = index < self.size and self._key(index).startswith(key + b" ")
+        return canonical, is_prefix
+
+    def close(self):
+        self._map.close()
+
+
+class CompanyExtractor:
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer
+
+    def _tokens(self, text):
+        tokens = []
+        for match in TOKEN_RE.finditer(text):
+            raw = match.group()
+            norm = _normalize_token(raw)
+            if not norm:
+                continue
+            tokens.append({
+                'raw': raw,
+                'norm': norm,
+                'start': match.start(),
+                'end': match.end(),
+                'capitalized': raw[0].isupper() or raw[0].isdigit(),
+                'upper': raw.isupper(),
+                # "Acme." ends a sentence, "Inc.", "J." and "J.P." do not.
+                'ends_sentence': raw.endswith('.') and raw.count('.') == 1 and len(norm) > 1
+                                 and norm not in LEGAL_SUFFIXES,
+                'suffix': norm in LEGAL_SUFFIXES and (raw[0].isupper() or norm == "plc")
+            })
+        return tokens
+
+    def _extend_suffix(self, tokens, end):
+        """Move end past following legal suffixes, including "& Co." and "and Company"."""
+        while end + 1 < len(tokens) and not tokens[end]['ends_sentence']:
+            if tokens[end + 1]['suffix']:
+                end += 1
+            elif tokens[end + 1]['norm'] in ("&", "and") and end + 2 < len(tokens) and tokens[end + 2]['suffix']:
+                end += 2
+            else:
+                break
+        return end
+
+    def _suffix_candidates(self, tokens):
+        """
+        Capitalized runs of words ending in one or more legal suffixes, as
+        (start, end, certain). In all-caps text capitalization cannot tell
+        where a name starts ("THE COURT ORDERS ACME HOLDINGS INC"), so such
+        runs are yielded as uncertain.
+        """
+        i = 0
+        while i < len(tokens):
+            if not tokens[i].get('suffix') or i == 0:
+                i += 1
+                continue
+            first_suffix = i
+            i = self._extend_suffix(tokens, i)
+            start = first_suffix
+            j = first_suffix - 1
+            while j >= 0 and first_suffix - j <= MAX_NAME_TOKENS and not tokens[j]['ends_sentence']:
+                token = tokens[j]
+                if token['norm'] in CONNECTORS and j > 0 and tokens[j - 1]['capitalized']:
+                    j -= 1
+                    continue
+                if not token['capitalized'] or token['norm'] in LEADING_STOPWORDS or token['suffix']:
+                    break
+                start = j
+                j -= 1
+            if start < first_suffix:
+                in_caps = all(t['upper'] for t in tokens[start:i + 1]) and (start == 0 or tokens[start - 1]['upper'])
+                yield start, i, not in_caps
+            i += 1
+
+    def _gazetteer_candidates(self, tokens):
+        """Longest gazetteer matches starting at capitalized words."""
+        i = 0
+        while i < len(tokens):
+            if not tokens[i]['capitalized'] or tokens[i]['norm'] in LEADING_STOPWORDS:
+                i += 1
+                continue
+            best = None
+            key = ""
+            j = i
+            while j < len(tokens) and j - i < MAX_NAME_TOKENS * 2:
+                key = f"{key} {tokens[j]['norm']}" if key else tokens[j]['norm']
+                canonical, is_prefix = self.gazetteer.lookup(key)
+                if canonical is not None:
+                    best = (j, canonical)
+                if not is_prefix or tokens[j]['ends_sentence']:
+                    break
+                j += 1
+            if best is None:
+                i += 1
+                continue
+            end, canonical = best
+            yield i, self._extend_suffix(tokens, end), canonical
+            i = end + 1
+
+    def extract(self, text):
+        """
+        Company candidates in text, merged on their normalized name and ordered
+        by first appearance. Each is a dict with name, key, confidence,
+        mentions and context (the sentence it first appeared in).
+        """
+        tokens = self._tokens(text)
+        spans = {}
+        suffix_starts = {}
+        for start, end, certain in self._suffix_candidates(tokens):
+            # Below COMPANY_CONFIDENCE, so "hybrid" has the model confirm and trim all-caps runs.
+            spans[start, end] = (None, 0.8 if certain else 0.5)
+            suffix_starts[end] = start
+        if self.gazetteer is not None:
+            for start, end, canonical in self._gazetteer_candidates(tokens):
+                has_suffix = tokens[end]['suffix']
+                # The gazetteer knows where the name starts better than the capitalization walk.
+                if suffix_starts.get(end, start) != start:
+                    del spans[suffix_starts.pop(end), end]
+                if has_suffix:
+                    confidence = 0.95
+                elif end - start >= 1:
+                    confidence = 0.9
+                else:
+                    # A lone known word ("Target", "Apple") may just be a word.
+                    confidence = 0.6
+                spans[start, end] = (canonical, confidence)
+
+        candidates = {}
+        for (start, end), (canonical, confidence) in sorted(spans.items()):
+            name = canonical
+            if name is None:
+                name = " ".join(text[tokens[start]['start']:tokens[end]['end']].split())
+                last = tokens[end]
+                if last['raw'].endswith('.') and last['raw'].count('.') == 1 and last['norm'] not in ABBREVIATED_SUFFIXES:
+                    name = name[:-1]
+            key = normalize_name(name)
+            if not key:
+                continue
+            candidate = candidates.get(key)
+            if candidate is None:
+                candidates[key] = {
+                    'name': name,
+                    'key': key,
+                    'confidence': confidence,
+                    'mentions': 1,
+                    'context': sentence_around(text, tokens[start]['start'], tokens[end]['end'])
+                }
+            else:
+                candidate['mentions'] += 1
+                candidate['confidence'] = max(candidate['confidence'], confidence)
+        for candidate in candidates.values():
+            # Repeated mentions of a lone word make it more likely to be a name.
+            if candidate['mentions'] > 2:
+                candidate['confidence'] = max(candidate['confidence'], 0.75)
+        return list(candidates.values())
+
+
+def sentence_around(text, start, end, limit=300):
+    left = max(text.rfind(". ", 0, start), text.rfind("\n", 0, start), start - limit // 2)
+    right_stop = [i for i in (text.find(". ", end), text.find("\n", end)) if i != -1]
+    right = min(right_stop + [end + limit // 2, len(text)])
+    return " ".join(text[max(left + 1, 0):right + 1].split())
+
+
+_extractor = None
+
+
+def get_extractor():
+    global _extractor
+    if _extractor is None:
+        _extractor = CompanyExtractor(Gazetteer(COMPANY_GAZETTEER) if COMPANY_GAZETTEER else None)
+    return _extractor
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        count = build_gazetteer(sys.argv[2], sys.argv[3])
+        print(f"Wrote {count} names to {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "extract":
+        from documents import iter_pages
+        extractor = get_extractor()
+        text = "\n".join(page for _, page in iter_pages(sys.argv[2]))
+        for candidate in extractor.extract(text):
+            print(f"{candidate['confidence']:.2f}  {candidate['mentions']:>3}  {candidate['name']}")
+    else:
+        print(__doc__.strip().split("\n\n")[0])
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# documents.py
+import codecs
+import os
+import re
+from collections import deque
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", 6000))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 300))
+# Rough English average, used to turn the token budget into a word budget.
+WORDS_PER_TOKEN = 0.75
+TEXT_BLOCK_SIZE = 1048576
+ENCODING_SAMPLE_SIZE = int(os.getenv("ENCODING_SAMPLE_SIZE", 65536))
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def iter_pages(file_path):
+    """Yield (page_number, text) one page at a time. Non-PDF files are a single page."""
+    if file_path.lower().endswith('.pdf'):
+        import fitz
+        with fitz.open(file_path) as document:
+            for page_number, page in enumerate(document, start=1):
+                yield page_number, page.get_text()
+    else:
+        # Form feeds mark page breaks in plain-text exports; most files are one page.
+        page_number = 1
+        for block in iter_text_blocks(file_path):
+            pages = block.split("\f")
+            for i, text in enumerate(pages):
+                if i:
+                    page_number += 1
+                yield page_number, text
+
+
+def extract_chunks(file_path):
+    """
+    Read and chunk one whole document. Top-level so it can run in a worker
+    process; the chunks are small dicts that pickle cheaply back to the caller.
+    """
+    return list(chunk_pages(iter_pages(file_path)))
+
+
+def detect_encoding(sample):
+    """Guess the encoding of a file from its first bytes instead of the whole file."""
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # final=False so a multi-byte character cut off at the end of the sample is fine.
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    import chardet
+    return chardet.detect(sample)['encoding'] or 'utf-8'
+
+
+def iter_text_blocks(file_path, block_size=TEXT_BLOCK_SIZE, sample_size=ENCODING_SAMPLE_SIZE):
+    """
+    Decode a text file block by block with the encoding detected from its
+    first sample_size bytes. If a later block does not decode, the encoding
+    is re-detected on that block and decoding continues with the new guess,
+    or with replacement characters if the guess is unchanged. Blocks end on
+    whitespace so no word is split between them.
+    """
+    with open(file_path, 'rb') as f:
+        encoding = detect_encoding(f.read(sample_size))
+        f.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+        carry = ""
+        while True:
+            data = f.read(block_size)
+            try:
+                text = decoder.decode(data, final=not data)
+            except UnicodeDecodeError:
+                detected = detect_encoding(data)
+                if detected.lower() == encoding.lower():
+                    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+                else:
+                    print(f"Encoding of {file_path} changed from {encoding} to {detected} mid-file.")
+                    encoding = detected
+                    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+                text = decoder.decode(data, final=not data)
+            text = carry + text
+            if not data:
+                if text:
+                    yield text
+                return
+            cut = max(text.rfind(" "), text.rfind("\n"))
+            if cut == -1 and len(text) < block_size:
+                carry = text
+                continue
+            if cut == -1:
+                cut = len(text) - 1
+            carry = text[cut + 1:]
+            yield text[:cut + 1]
+
+
+def chunk_pages(pages, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Split a stream of pages into windows of at most max_tokens, each repeating
+    the last overlap_tokens of the previous one so findings that straddle a
+    boundary are not lost. Yields {'text', 'first_page', 'last_page'}.
+    """
+    max_words = max(1, int(max_tokens * WORDS_PER_TOKEN))
+    overlap_words = min(int(overlap_tokens * WORDS_PER_TOKEN), max_words - 1)
+    # The window is a list of (page_number, words) runs rather than one entry per word.
+    window = []
+    size = 0
+    fresh = 0
+    for page_number, text in pages:
+        words = text.split()
+        start = 0
+        while start < len(words):
+            take = min(max_words - size, len(words) - start)
+            window.append((page_number, words[start:start + take]))
+            size += take
+            fresh += take
+            start += take
+            if size >= max_words:
+                yield _make_chunk(window)
+                window = _tail(window, overlap_words)
+                size = overlap_words
+                fresh = 0
+    if fresh:
+        yield _make_chunk(window)
+
+
+def _tail(window, count):
+    """The last count words of window, as runs."""
+    tail = []
+    for page_number, words in reversed(window):
+        if count <= 0:
+            break
+        tail.append((page_number, words[-count:]))
+        count -= len(words)
+    tail.reverse()
+    return tail
+
+
+def _make_chunk(window):
+    return {
+        'text': " ".join(" ".join(words) for _, words in window),
+        'first_page': window[0][0],
+        'last_page': window[-1][0]
+    }
+
+
+def page_label(first_page, last_page):
+    if first_page == last_page:
+        return f"page {first_page}"
+    return f"pages {first_page}-{last_page}"
+
+
+def map_bounded(executor, fn, iterable, max_in_flight):
+    """Like executor.map, but only pulls max_in_flight items from iterable at a time."""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _normalize_company(name):
+    return re.sub(r'[^a-z0-9&]+', ' ', name.casefold()).strip()
+
+
+def merge_company_lists(findings):
+    """
+    Merge per-chunk company lists into one, de-duplicated on a normalized name.
+    findings is an iterable of (chunk, output_text). Companies are ordered by
+    how many chunks mention them, then by first appearance, and carry the
+    pages they were found on.
+    """
+    companies = {}
+    for chunk, output_text in findings:
+        for line in output_text.splitlines():
+            name = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).replace("**", "").strip()
+            key = _normalize_company(name)
+            if not key:
+                continue
+            company = companies.setdefault(key, {'name': name, 'mentions': 0, 'pages': set()})
+            company['mentions'] += 1
+            company['pages'].update(range(chunk['first_page'], chunk['last_page'] + 1))
+    ordered = sorted(companies.values(), key=lambda c: -c['mentions'])
+    for company in ordered:
+        company['pages'] = sorted(company['pages'])
+    return ordered
+
+
+def merge_document_companies(documents):
+    """
+    Merge the company lists of several documents. documents is an iterable of
+    (document_name, companies) as returned by merge_company_lists. Companies
+    are ordered by how many documents mention them, then by total mentions.
+    """
+    merged = {}
+    for document_name, companies in documents:
+        for company in companies:
+            key = _normalize_company(company['name'])
+            entry = merged.setdefault(key, {'name': company['name'], 'mentions': 0, 'documents': []})
+            entry['mentions'] += company['mentions']
+            if document_name not in entry['documents']:
+                entry['documents'].append(document_name)
+    return sorted(merged.values(), key=lambda c: (-len(c['documents']), -c['mentions']))
@@ -0,0 +1,187 @@
+# jobs.py
+import os
+import queue
+import threading
+import time
+import uuid
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 32))
+JOB_TTL = int(os.getenv("JOB_TTL", 3600))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Pending:
+    """
+    Returned by a job step that is waiting on remote work: once future is
+    done, then(job, future) runs on a worker as the job's next step, and may
+    itself return the job's result or another Pending.
+    """
+    def __init__(self, future, then):
+        self.future = future
+        self.then = then
+
+
+class Job:
+    """
+    A queued pipeline run. Besides its current status, a job keeps every
+    event it emitted (stage changes, partial results) numbered from 1, so a
+    stream can replay what a client missed from the last ID it saw.
+    """
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.message = 'Waiting for a free worker...'
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def update(self, status, message, progress=None):
+        with self._lock:
+            self.status = status
+            self.message = message
+            if progress is not None:
+                self.progress = progress
+            progress = self.progress
+        self.emit('stage', {'status': status, 'message': message, 'progress': progress})
+
+    def emit(self, event, data):
+        """Record an event and wake every listener; listeners must return quickly."""
+        with self._lock:
+            self.events.append((len(self.events) + 1, event, data))
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def events_after(self, last_id):
+        """Events with an ID above last_id, as (id, event, data)."""
+        with self._lock:
+            return self.events[max(0, last_id):]
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'message': self.message,
+                'progress': self.progress,
+                'result': self.result,
+                'error': self.error,
+                'created': self.created,
+                'finished': self.finished
+            }
+
+
+class JobManager:
+    """
+    Runs pipeline functions on a fixed pool of worker threads.
+    submit() never blocks: when queue_size new jobs are already waiting it
+    raises QueueFull so the caller can answer with 503 instead of pinning a
+    request thread. A step that returns Pending gives its worker back while
+    the remote work runs, so any number of jobs can be in flight; their next
+    steps are queued as the futures complete and are not held to queue_size.
+    Finished jobs are kept for `ttl` seconds and then evicted.
+    """
+    def __init__(self, workers=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE, ttl=JOB_TTL):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self._queue = queue.Queue()
+        self._queued = 0
+        self._waiting = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return the new Job."""
+        self._start()
+        self.evict_expired()
+        job = Job(kind)
+        with self._lock:
+            if self._queued >= self.queue_size:
+                raise QueueFull("Too many jobs in progress, please retry shortly.")
+            self._queued += 1
+            self._jobs[job.id] = job
+        self._queue.put((job, fn, args, kwargs, True))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def evict_expired(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'workers': self.workers, 'queued': self._queued, 'waiting': self._waiting, 'jobs': counts}
+
+    def _resume(self, job, then, future):
+        with self._lock:
+            self._waiting -= 1
+        self._queue.put((job, then, (future,), {}, False))
+
+    def _work(self):
+        while True:
+            job, fn, args, kwargs, new = self._queue.get()
+            if new:
+                with self._lock:
+                    self._queued -= 1
+            try:
+                if new:
+                    job.update('running', 'Starting...')
+                result = fn(job, *args, **kwargs)
+                if isinstance(result, Pending):
+                    with self._lock:
+                        self._waiting += 1
+                    result.future.add_done_callback(
+                        lambda future, job=job, then=result.then: self._resume(job, then, future))
+                    continue
+                with job._lock:
+                    job.result = result
+                job.update('completed', 'Analysis complete!', 100)
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                with job._lock:
+                    job.error = str(e)
+                job.update('error', str(e))
+            job.finished = time.time()
+            job.emit('done', {'status': job.status, 'error': job.error})
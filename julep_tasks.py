@@ -0,0 +1,221 @@
+# julep_tasks.py
+import hashlib
+import json
+import os
+import threading
+
+from ratelimit import api_call, status_of
+
+JULEP_TASK_CACHE = os.getenv("JULEP_TASK_CACHE", os.path.join("cache", "julep_tasks.json"))
+JULEP_AGENT_CACHE = os.getenv("JULEP_AGENT_CACHE", os.path.join("cache", "julep_agent.json"))
+
+# Each task is created once with the document left as a template variable;
+# callers pass the actual text as execution input {"text": ...}.
+TASK_DEFINITIONS = {
+    "risk_analysis": {
+        "name": "AI Risk Analysis",
+        "description": "Analyze transcript for risk-related keywords and phrases.",
+        "system": "You are an assistant that identifies risk indicators in transcripts of spoken content.",
+        "prompt": """
+    Analyze the following transcript and identify any risk-related keywords or phrases relevant to reputation, legal issues, financial instability, or controversies. For each item you identify, provide a brief explanation of why it might be a risk indicator.
+
+    Transcript:
+    {{_.text}}
+
+    Return the results as a numbered list.
+    """
+    },
+    "public_company": {
+        "name": "Public Record Company Extraction",
+        "description": "Public Record Company Extraction",
+        "system": "You are an assistant specializing in public case risk analysis.",
+        "prompt": """
+            You are an expert in public case analysis. Based on the text excerpt provided below from a public record, identify the companys involved in the case. and just output the companys names
+
+            Text:
+            {{_.text}}
+            """
+    },
+    "public_risk": {
+        "name": "Public Record Risk Analysis",
+        "description": "Public Record Risk Analysis",
+        "system": "You are an assistant specializing in public case risk analysis.",
+        "prompt": """
+            You are an expert in analyzing public case documents.
+            Analyze the following document excerpt for risk-related indicators
+            (such as signs of bankruptcy, fraud, legal investigations, or other controversies) that might affect the reputation or financial stability of the company.
+            Provide a detailed risk analysis report that summarizes the main risk factors.
+
+            Document:
+            {{_.text}}
+            """
+    },
+    "company_confirm": {
+        "name": "Company Candidate Confirmation",
+        "description": "Confirm which locally found candidates are company names",
+        "system": "You are an assistant that extracts company names from documents.",
+        "prompt": """
+            Below are candidate company names found in a public record, each followed by the sentence it appeared in.
+            Return only the candidates that are companies or other business organizations, one per line, exactly as written.
+            If a candidate starts with words that are not part of the name (as in "COURT ORDERS ACME HOLDINGS INC"),
+            return it without them ("ACME HOLDINGS INC").
+            If none of them are, return nothing.
+
+            Candidates:
+            {{_.text}}
+            """
+    },
+    "public_risk_merge": {
+        "name": "Public Record Risk Merge",
+        "description": "Merge per-section risk findings into one report",
+        "system": "You are an assistant specializing in public case risk analysis.",
+        "prompt": """
+            Below are risk findings from consecutive sections of one long public case document.
+            Combine them into a single detailed risk analysis report that summarizes the main risk factors.
+            Merge duplicate findings and keep the page references for each risk factor.
+
+            Findings:
+            {{_.text}}
+            """
+    },
+    "public_risk_batch_merge": {
+        "name": "Public Record Batch Risk Merge",
+        "description": "Merge the risk reports of several documents into one summary",
+        "system": "You are an assistant specializing in public case risk analysis.",
+        "prompt": """
+            Below are risk reports for several public case documents concerning the same counterparty.
+            Combine them into a single risk summary for the counterparty that lists the main risk factors.
+            Merge duplicate findings and name the documents that support each risk factor.
+
+            Reports:
+            {{_.text}}
+            """
+    }
+}
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_not_found(error):
+    """Whether Julep answered 404, e.g. for an agent or task deleted since its ID was saved."""
+    return status_of(error) == 404
+
+
+def load_or_create_agent(client, name, model, about, path=JULEP_AGENT_CACHE, refresh=False):
+    """
+    Return the ID of the agent persisted for (name, model), creating it on
+    first use. With refresh=True the saved ID is dropped and a new agent created.
+    """
+    agent_ids = _read_json(path)
+    key = f"{name}:{model}"
+    if key in agent_ids and not refresh:
+        return agent_ids[key]
+    agent = api_call("julep", lambda: client.agents.create(name=name, model=model, about=about), idempotent=False)
+    print("Julep Agent created successfully for risk analysis.")
+    agent_ids[key] = agent.id
+    _write_json(path, agent_ids)
+    return agent.id
+
+
+class TaskRegistry:
+    """
+    Creates each Julep task kind at most once and remembers its ID in
+    JULEP_TASK_CACHE, keyed by agent and a hash of the task definition so an
+    edited prompt gets a fresh task while restarts reuse the existing one.
+    A saved task or agent that Julep no longer knows is dropped and recreated
+    once; recreate_agent() returns the ID of a new agent.
+    """
+    def __init__(self, client, agent_id, path=JULEP_TASK_CACHE, recreate_agent=None):
+        self.client = client
+        self.agent_id = agent_id
+        self.path = path
+        self.recreate_agent = recreate_agent
+        self._lock = threading.Lock()
+        self._task_ids = None
+
+    def _load(self):
+        if self._task_ids is None:
+            self._task_ids = _read_json(self.path)
+        return self._task_ids
+
+    def _save(self):
+        _write_json(self.path, self._task_ids)
+
+    def _key(self, kind):
+        definition = json.dumps(TASK_DEFINITIONS[kind], sort_keys=True)
+        digest = hashlib.sha256(definition.encode('utf-8')).hexdigest()[:12]
+        return f"{self.agent_id}:{kind}:{digest}"
+
+    def _create_task(self, definition):
+        return api_call("julep", lambda: self.client.tasks.create(
+            agent_id=self.agent_id,
+            name=definition["name"],
+            description=definition["description"],
+            main=[{
+                "prompt": [
+                    {"role": "system", "content": definition["system"]},
+                    {"role": "user", "content": definition["prompt"]}
+                ],
+                "return": {"result": "Risk Analysis Report."}
+            }]
+        ), idempotent=False)
+
+    def _replace_agent(self):
+        """Switch to a new agent and forget the tasks saved for the old one."""
+        old_agent_id = self.agent_id
+        self.agent_id = self.recreate_agent()
+        print(f"Julep agent {old_agent_id} no longer exists; created {self.agent_id}.")
+        task_ids = self._load()
+        for key in [k for k in task_ids if k.startswith(f"{old_agent_id}:")]:
+            del task_ids[key]
+
+    def get_task_id(self, kind, stale=None):
+        """ID of the task for kind; pass the ID Julep just reported missing as stale to have it recreated."""
+        with self._lock:
+            task_ids = self._load()
+            key = self._key(kind)
+            if key in task_ids and task_ids[key] != stale:
+                return task_ids[key]
+            definition = TASK_DEFINITIONS[kind]
+            try:
+                task = self._create_task(definition)
+            except Exception as e:
+                if not is_not_found(e) or self.recreate_agent is None:
+                    raise
+                self._replace_agent()
+                key = self._key(kind)
+                task = self._create_task(definition)
+            task_ids[key] = task.id
+            self._save()
+            print(f"Julep task '{definition['name']}' registered with ID {task.id}")
+            return task.id
+
+    def execute(self, kind, text):
+        """Start an execution of the registered task with text as its input."""
+        task_id = self.get_task_id(kind)
+        try:
+            return api_call("julep", lambda: self.client.executions.create(task_id=task_id, input={"text": text}),
+                            idempotent=False)
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+            print(f"Julep task {task_id} no longer exists; recreating it.")
+            task_id = self.get_task_id(kind, stale=task_id)
+            return api_call("julep", lambda: self.client.executions.create(task_id=task_id, input={"text": text}),
+                            idempotent=False)
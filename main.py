@@ -1,40 +1,133 @@
 import os
-import time
+import re
+import threading
 import requests
-import yt_dlp
-from moviepy.editor import VideoFileClip
+from requests.adapters import HTTPAdapter
+import hashlib
+import shutil
+import subprocess
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
-import chardet
-import fitz  # PyMuPDF
-from flask import request, jsonify
-from julep import Julep
+from transcript_cache import transcript_cache, audio_key
+from julep_tasks import TaskRegistry, load_or_create_agent
+from poller import poller, completed, chain
+from news_cache import news_cache
+from prescreen import RISK_PRESCREEN, screen_news, screen_transcript
+from companies import COMPANY_EXTRACTOR, COMPANY_CONFIDENCE, get_extractor, normalize_name
+from metrics import traced, traced_future, add_bytes
+from ratelimit import api_call, is_transient, in_current_lane, status_of
+from documents import (
+    iter_pages,
+    chunk_pages,
+    extract_chunks,
+    page_label,
+    map_bounded,
+    merge_company_lists,
+    merge_document_companies
+)
 
 load_dotenv()
-ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
-JULEP_API_KEY = os.getenv("JULEP_API_KEY")
-SERPAPI_KEY = os.getenv('SERPAPI_KEY')
-if not ASSEMBLYAI_API_KEY:
-    raise ValueError("Please set the ASSEMBLYAI_API_KEY in your .env file")
-if not JULEP_API_KEY:
-    raise ValueError("Please set the JULEP_API_KEY in your .env file")
-if not SERPAPI_KEY:
-    raise ValueError("Please set the SERPAPI_KEY in your .env file")
+def require_key(name):
+    """API keys are checked when a stage first needs them, so the module imports without them."""
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"Please set the {name} in your .env file")
+    return value
 
 UPLOAD_URL = "https://api.assemblyai.com/v2/upload"
 TRANSCRIPT_URL = "https://api.assemblyai.com/v2/transcript"
-AAI_HEADERS = {"authorization": ASSEMBLYAI_API_KEY}
-
-try:
-    julep_client = Julep(api_key=JULEP_API_KEY)
-    agent = julep_client.agents.create(
-        name="Risk Analyzer",
-        model="o1-preview",
-        about="Detects risk-related keywords and phrases in a transcript."
-    )
-    print("Julep Agent created successfully for risk analysis.")
-except Exception as e:
-    print(f"Error creating Julep Agent: {str(e)}")
-    agent = None
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+def aai_headers():
+    return {"authorization": require_key("ASSEMBLYAI_API_KEY")}
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+
+# One keep-alive connection pool shared by every AssemblyAI and SerpAPI call.
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
+
+TRANSCRIPT_DEADLINE = int(os.getenv("TRANSCRIPT_DEADLINE", 1800))
+EXECUTION_DEADLINE = int(os.getenv("EXECUTION_DEADLINE", 600))
+# Optional public URL of /webhooks/assemblyai so AssemblyAI can cut polling short.
+ASSEMBLYAI_WEBHOOK_URL = os.getenv("ASSEMBLYAI_WEBHOOK_URL")
+
+DOC_CHUNK_WORKERS = int(os.getenv("DOC_CHUNK_WORKERS", 4))
+chunk_executor = ThreadPoolExecutor(max_workers=DOC_CHUNK_WORKERS, thread_name_prefix="doc-chunk")
+
+# PDF text extraction is CPU-bound, so multi-document batches extract in
+# worker processes. The pool is started on first use with "spawn" rather than
+# fork, since the app is already running threads by then.
+DOC_EXTRACT_WORKERS = int(os.getenv("DOC_EXTRACT_WORKERS", os.cpu_count() or 1))
+_extract_lock = threading.Lock()
+_extract_executor = None
+
+def get_extract_executor():
+    global _extract_executor
+    with _extract_lock:
+        if _extract_executor is None:
+            import multiprocessing
+            _extract_executor = ProcessPoolExecutor(
+                max_workers=DOC_EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extract_executor
+
+def discard_extract_executor(executor):
+    """Drop a pool whose worker died (e.g. a crash inside PyMuPDF) so the next batch starts a fresh one."""
+    global _extract_executor
+    with _extract_lock:
+        if _extract_executor is executor:
+            _extract_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# "on" pipes audio from the remote media straight into the AssemblyAI upload
+# without temp files, falling back to the download/extract path on failure.
+STREAM_AUDIO = os.getenv("STREAM_AUDIO", "on")
+UPLOAD_CHUNK_SIZE = 5242880
+
+# "fast" downloads audio-only formats or copies the audio stream without
+# re-encoding; "moviepy" always decodes and re-encodes to MP3.
+AUDIO_EXTRACT_MODE = os.getenv("AUDIO_EXTRACT_MODE", "fast")
+
+JULEP_AGENT_MODEL = os.getenv("JULEP_AGENT_MODEL", "o1-preview")
+
+# The Julep client, agent and task registry are created on first analysis,
+# and the agent ID is persisted so restarts and forked workers reuse it.
+_julep_lock = threading.Lock()
+_julep_client = None
+_task_registry = None
+
+def get_julep_client():
+    global _julep_client
+    with _julep_lock:
+        if _julep_client is None:
+            from julep import Julep
+            # Retries go through ratelimit.api_call so they share the Julep rate limit.
+            _julep_client = Julep(api_key=require_key("JULEP_API_KEY"), max_retries=0)
+        return _julep_client
+
+def get_task_registry():
+    """The shared TaskRegistry, or None if the Julep agent cannot be set up."""
+    global _task_registry
+    client = get_julep_client()
+    with _julep_lock:
+        if _task_registry is None:
+            agent = dict(
+                name="Risk Analyzer",
+                model=JULEP_AGENT_MODEL,
+                about="Detects risk-related keywords and phrases in a transcript."
+            )
+            try:
+                agent_id = load_or_create_agent(client, **agent)
+                _task_registry = TaskRegistry(
+                    client, agent_id, recreate_agent=lambda: load_or_create_agent(client, refresh=True, **agent)
+                )
+            except Exception as e:
+                print(f"Error creating Julep Agent: {str(e)}")
+                return None
+        return _task_registry
 
 def detect_platform(url):
     url_lower = url.lower()
@@ -47,59 +140,242 @@ def detect_platform(url):
     else:
         raise ValueError("Unsupported URL domain. Please provide a TikTok, Instagram, or Twitter URL.")
 
+@traced("download_video", failed=lambda path: path is None)
 def download_video(url, output_filename="video.mp4"):
     platform = detect_platform(url)
     print(f"Detected platform: {platform}")
     ydl_opts = {'format': 'mp4', 'outtmpl': output_filename, 'noplaylist': True}
     try:
+        import yt_dlp
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             print(f"Downloading video from: {url}")
             ydl.download([url])
             print("Video download completed!")
+        if os.path.exists(output_filename):
+            add_bytes("download_video", os.path.getsize(output_filename))
         return output_filename
     except Exception as e:
         print("An error occurred during video download:", e)
         return None
 
-def extract_audio(video_filename, audio_filename="audio.mp3"):
+# None only means the platform has no audio-only format; the caller falls back to the video.
+@traced("download_audio")
+def download_audio(url, output_dir):
+    """Download an audio-only format if the platform offers one. Returns the file path or None."""
+    detect_platform(url)
+    ydl_opts = {
+        'format': 'bestaudio[vcodec=none]',
+        'outtmpl': os.path.join(output_dir, 'audio.%(ext)s'),
+        'noplaylist': True
+    }
     try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            print(f"Downloading audio-only format from: {url}")
+            info = ydl.extract_info(url, download=True)
+            audio_filename = ydl.prepare_filename(info)
+        print("Audio download completed!")
+        add_bytes("download_audio", os.path.getsize(audio_filename))
+        return audio_filename
+    except Exception as e:
+        print("No audio-only format available:", e)
+        return None
+
+def get_ffmpeg_exe():
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        return ffmpeg
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+def copy_audio_stream(video_filename, audio_filename):
+    """Copy the audio track out of the container without transcoding."""
+    command = [get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-i', video_filename,
+               '-vn', '-acodec', 'copy', '-f', 'mp4', audio_filename]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        print(f"Audio stream copied to {audio_filename}")
+        add_bytes("extract_audio", os.path.getsize(audio_filename))
+        return audio_filename
+    except Exception as e:
+        print("Could not copy audio stream:", e)
+        return None
+
+@traced("extract_audio", failed=lambda path: path is None)
+def extract_audio(video_filename, audio_filename="audio.mp3", mode=None):
+    """
+    Returns the path of the extracted audio, which in "fast" mode is an .m4a
+    next to audio_filename rather than audio_filename itself.
+    """
+    if (mode or AUDIO_EXTRACT_MODE) == "fast":
+        copied = copy_audio_stream(video_filename, os.path.splitext(audio_filename)[0] + ".m4a")
+        if copied:
+            return copied
+    try:
+        from moviepy.editor import VideoFileClip
         clip = VideoFileClip(video_filename)
         clip.audio.write_audiofile(audio_filename)
         clip.close()
         print(f"Audio extracted to {audio_filename}")
+        add_bytes("extract_audio", os.path.getsize(audio_filename))
         return audio_filename
     except Exception as e:
         print("Error extracting audio:", e)
         return None
 
 def upload_file(filename):
-    CHUNK_SIZE = 5242880
-    def read_file(filename, chunk_size=CHUNK_SIZE):
+    def read_file(filename, chunk_size=UPLOAD_CHUNK_SIZE):
         with open(filename, 'rb') as _file:
             while True:
                 data = _file.read(chunk_size)
                 if not data: break
                 yield data
     print(f"Uploading {filename} to AssemblyAI...")
-    response = requests.post(UPLOAD_URL, headers=AAI_HEADERS, data=read_file(filename))
+    return upload_chunks(lambda: read_file(filename))
+
+@traced("upload_file")
+def upload_chunks(make_chunks, retries=None):
+    """
+    POST the byte chunks yielded by make_chunks() to AssemblyAI as one chunked
+    upload. make_chunks is called again for each retry; pass retries=0 when
+    the chunks come from a stream that cannot be replayed.
+    """
+    uploaded = 0
+    def counted(chunks):
+        nonlocal uploaded
+        for data in chunks:
+            uploaded += len(data)
+            yield data
+    def post():
+        nonlocal uploaded
+        uploaded = 0
+        return http_session.post(UPLOAD_URL, headers=aai_headers(), data=counted(make_chunks()))
+    response = api_call("assemblyai", post, retries=retries)
     if response.status_code != 200:
         raise Exception(f"Upload failed: {response.text}")
+    add_bytes("upload_file", uploaded)
     upload_url = response.json()['upload_url']
     print("Upload completed!")
     return upload_url
 
+def resolve_media_url(url):
+    """
+    Direct media URL, request headers and protocol of the format the download
+    path would fetch (audio-only if offered in "fast" mode, else the mp4), so
+    both paths hash the same bytes.
+    """
+    import yt_dlp
+    detect_platform(url)
+    media_format = 'bestaudio[vcodec=none]/mp4' if AUDIO_EXTRACT_MODE == "fast" else 'mp4'
+    with yt_dlp.YoutubeDL({'quiet': True, 'noplaylist': True, 'format': media_format}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return info['url'], info.get('http_headers', {}), info.get('protocol', 'https')
+
+@traced("download_audio")
+def fetch_media(media_url, http_headers, sink, digest, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Write media_url into sink as it is served, feeding digest the same bytes,
+    so it ends up as the audio_key() a download of the same format would get.
+    """
+    fetched = 0
+    with http_session.get(media_url, headers=http_headers, stream=True) as response:
+        response.raise_for_status()
+        for data in response.iter_content(chunk_size):
+            digest.update(data)
+            sink.write(data)
+            fetched += len(data)
+    add_bytes("download_audio", fetched)
+
+def stream_audio(media_url, http_headers, digest, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Yield the audio track of remote media as fragmented MP4. The source is
+    fetched into ffmpeg's stdin by a feeder thread and the audio copied out
+    of its stdout without transcoding, so nothing touches disk. Raises once
+    the stream ends if the fetch or ffmpeg failed, which aborts an upload
+    consuming it.
+    """
+    command = [get_ffmpeg_exe(), '-loglevel', 'error', '-xerror', '-i', 'pipe:0', '-vn', '-acodec', 'copy',
+               '-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov', 'pipe:1']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    failure = []
+    def feed():
+        try:
+            fetch_media(media_url, http_headers, process.stdin, digest, chunk_size)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+    feeder = threading.Thread(target=feed, name="media-fetch", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            data = process.stdout.read(chunk_size)
+            if not data: break
+            yield data
+        feeder.join()
+        if failure:
+            raise Exception(f"Media fetch failed: {failure[0]}")
+        if process.wait() != 0:
+            raise Exception(f"ffmpeg failed: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        feeder.join()
+
+def stream_upload(url):
+    """
+    Upload url's audio track piped from the source through ffmpeg, with no
+    temporary files. Returns (upload_url, key, audio_bytes): key is the
+    SHA-256 of the source as fetched, the same key the download path gives
+    the same media, and audio_bytes the size of the uploaded audio.
+    """
+    media_url, http_headers, protocol = resolve_media_url(url)
+    if protocol not in ("http", "https"):
+        raise Exception(f"{protocol} media cannot be fetched directly")
+    digest = hashlib.sha256()
+    audio_bytes = 0
+    def counted(chunks):
+        nonlocal audio_bytes
+        for data in chunks:
+            audio_bytes += len(data)
+            yield data
+    print(f"Streaming audio from {url} to AssemblyAI...")
+    # The source is only read once, so a failed upload cannot be replayed.
+    upload_url = upload_chunks(lambda: counted(stream_audio(media_url, http_headers, digest)), retries=0)
+    return upload_url, digest.hexdigest(), audio_bytes
+
+@traced("request_transcript")
 def request_transcript(audio_url):
     json_data = { "audio_url": audio_url }
-    response = requests.post(TRANSCRIPT_URL, json=json_data, headers=AAI_HEADERS)
+    if ASSEMBLYAI_WEBHOOK_URL:
+        json_data["webhook_url"] = ASSEMBLYAI_WEBHOOK_URL
+    # Not idempotent: a retry after a 5xx could start a second, billed transcription.
+    response = api_call("assemblyai", lambda: http_session.post(TRANSCRIPT_URL, json=json_data, headers=aai_headers()),
+                        idempotent=False)
     if response.status_code != 200:
         raise Exception(f"Transcription request failed: {response.text}")
     transcript_id = response.json()['id']
     return transcript_id
 
-def poll_transcript(transcript_id, polling_interval=5):
+def estimate_transcription_seconds(audio_bytes):
+    """Rough turnaround guess: ~128 kbps audio, transcribed at about a quarter of real time."""
+    audio_seconds = audio_bytes / 16000
+    return 3 + audio_seconds / 4
+
+def watch_transcript(transcript_id, expected_duration=None):
+    """Register the transcript with the shared poller and return a Future of its JSON."""
     polling_url = f"{TRANSCRIPT_URL}/{transcript_id}"
-    while True:
-        response = requests.get(polling_url, headers=AAI_HEADERS)
+    @in_current_lane
+    def check():
+        response = api_call("assemblyai", lambda: http_session.get(polling_url, headers=aai_headers()), retries=0)
+        if is_transient(response):
+            # The poller checks again after its next backoff step.
+            print(f"Transcript poll returned {response.status_code}; will retry.")
+            return None
         if response.status_code != 200:
             raise Exception(f"Error polling transcript: {response.text}")
         status = response.json()['status']
@@ -108,69 +384,193 @@ def poll_transcript(transcript_id, polling_interval=5):
             return response.json()
         elif status == 'error':
             raise Exception(f"Transcription failed: {response.json().get('error')}")
+        print(f"Transcription status: {status}.")
+        return None
+    return poller.watch(f"aai:{transcript_id}", check, expected_duration, deadline=TRANSCRIPT_DEADLINE)
+
+def watch_execution(execution_id):
+    """Register the Julep execution with the shared poller and return a Future of it once it has succeeded or failed."""
+    @in_current_lane
+    def check():
+        try:
+            result = api_call("julep", lambda: get_julep_client().executions.get(execution_id), retries=0)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            print(f"Execution poll failed ({status_of(e) or type(e).__name__}); will retry.")
+            return None
+        if result.status in ["succeeded", "failed"]:
+            return result
+        return None
+    return poller.watch(f"julep:{execution_id}", check, deadline=EXECUTION_DEADLINE)
+
+def wait_for_execution(execution_id):
+    return watch_execution(execution_id).result()
+
+def get_video_id(url):
+    """Canonical "<platform>:<id>" for a post, read from yt-dlp metadata without downloading."""
+    platform = detect_platform(url)
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL({'quiet': True, 'noplaylist': True}) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+        return f"{platform}:{info['id']}"
+    except Exception as e:
+        print("Could not read video ID:", e)
+        return None
+
+def start_transcription(url, workdir, on_stage=None):
+    """
+    Start transcribing a video, consulting the transcript cache by platform video ID
+    first. Audio is streamed into the upload when STREAM_AUDIO is on;
+    otherwise, or if the media cannot be streamed, it is downloaded and
+    extracted to workdir. Either way the cache is also looked up by a hash of
+    the source media before a transcript is requested.
+    on_stage(status, message, progress) is called as each stage starts.
+    Returns once the audio is uploaded, with a Future of the transcript JSON,
+    so workdir can be removed while AssemblyAI is still transcribing.
+    """
+    def stage(status, message, progress):
+        if on_stage:
+            on_stage(status, message, progress)
+    video_id = get_video_id(url)
+    if video_id:
+        transcript_json = transcript_cache.get_by_video_id(video_id)
+        if transcript_json is not None:
+            print(f"Transcript cache hit for {video_id}")
+            return completed(transcript_json)
+    if STREAM_AUDIO == "on":
+        stage('transcribing', 'Streaming audio for transcription...', 30)
+        # Only getting the media to AssemblyAI falls back; past that a retry would bill a second transcription.
+        try:
+            audio_url, key, audio_bytes = stream_upload(url)
+        except Exception as e:
+            print("Streaming audio failed, falling back to download:", e)
         else:
-            print(f"Transcription status: {status}. Waiting {polling_interval} seconds...")
-            time.sleep(polling_interval)
+            transcript_json = transcript_cache.get(key)
+            if transcript_json is not None:
+                print("Transcript cache hit for streamed media")
+                if video_id:
+                    transcript_cache.add_alias(video_id, key)
+                return completed(transcript_json)
+            return finish_transcription(audio_url, audio_bytes, key, video_id)
+    audio_file = None
+    if AUDIO_EXTRACT_MODE == "fast":
+        stage('downloading', 'Downloading audio...', 10)
+        audio_file = download_audio(url, workdir)
+    if audio_file:
+        key = audio_key(audio_file)
+    else:
+        stage('downloading', 'Downloading video...', 10)
+        video_file = os.path.join(workdir, 'video.mp4')
+        if not download_video(url, video_file):
+            raise Exception('Video download failed')
+        # Keyed on the downloaded media like the stream path, which also saves extracting on a hit.
+        key = audio_key(video_file)
+    transcript_json = transcript_cache.get(key)
+    if transcript_json is not None:
+        print("Transcript cache hit for downloaded media")
+        if video_id:
+            transcript_cache.add_alias(video_id, key)
+        return completed(transcript_json)
+    if not audio_file:
+        stage('processing_audio', 'Extracting audio...', 30)
+        audio_file = extract_audio(video_file, os.path.join(workdir, 'audio.mp3'))
+        if not audio_file:
+            raise Exception('Audio extraction failed')
+    stage('transcribing', 'Transcribing audio...', 50)
+    audio_url = upload_file(audio_file)
+    return finish_transcription(audio_url, os.path.getsize(audio_file), key, video_id)
+
+def transcribe_url(url, workdir, on_stage=None):
+    """Blocking start_transcription(), for callers that have a thread to spare."""
+    return start_transcription(url, workdir, on_stage).result()
+
+def finish_transcription(audio_url, audio_bytes, key, video_id):
+    """
+    Request a transcript of uploaded audio. Returns a Future of its JSON,
+    which is cached under key and video_id before the future completes.
+    """
+    transcript_id = request_transcript(audio_url)
+    print(f"Transcription requested. Transcript ID: {transcript_id}")
+    watching = watch_transcript(transcript_id, estimate_transcription_seconds(audio_bytes))
+    traced_future("poll_transcript", watching)
+    def cache(transcript_json):
+        transcript_cache.put(key, transcript_json, video_id)
+        return transcript_json
+    return chain(watching, cache)
+
+def format_transcript_text(transcript_json):
+    lines = ["Full Transcript:", transcript_json.get("text", ""), ""]
+    if transcript_json.get("utterances"):
+        lines.append("Speaker Breakdown:")
+        for utterance in transcript_json["utterances"]:
+            lines.append(f"Speaker {utterance.get('speaker', 'N/A')}: {utterance.get('text', '')}")
+    return "\n".join(lines) + "\n"
 
 def save_transcript_text(transcript_json, output_textfile="transcript.txt"):
     with open(output_textfile, 'w', encoding='utf-8') as f:
-        f.write("Full Transcript:\n")
-        f.write(transcript_json.get("text", "") + "\n\n")
-        if transcript_json.get("utterances"):
-            f.write("Speaker Breakdown:\n")
-            for utterance in transcript_json["utterances"]:
-                f.write(f"Speaker {utterance.get('speaker', 'N/A')}: {utterance.get('text', '')}\n")
+        f.write(format_transcript_text(transcript_json))
     print(f"Transcript saved to {output_textfile}")
 
-def analyze_risks_with_ai(transcript_text, output_file="risk_report.txt"):
+def start_risk_analysis(transcript_text, utterances=None, on_prescreen=None, news=False):
+    """
+    Start the Julep risk analysis of transcript_text and return a Future of
+    the report, "" on failure. With the pre-screen on, on_prescreen(categories)
+    is called with the matched risk categories before the model is asked.
+    Pass news=True for display_news_results() output, which is screened by
+    article rather than by sentence.
+    """
     if not transcript_text:
         print("No transcript text available for AI risk analysis.")
-        return ""
-    if agent is None:
-        print("Julep Agent not initialized. Cannot perform AI risk analysis.")
-        return ""
-    prompt = f"""
-    Analyze the following transcript and identify any risk-related keywords or phrases relevant to reputation, legal issues, financial instability, or controversies. For each item you identify, provide a brief explanation of why it might be a risk indicator.
-
-    Transcript:
-    {transcript_text}
-
-    Return the results as a numbered list.
-    """
-    try:
-        task = julep_client.tasks.create(
-            agent_id=agent.id,
-            name="AI Risk Analysis",
-            description="Analyze transcript for risk-related keywords and phrases.",
-            main=[{
-                "prompt": [
-                    {"role": "system", "content": "You are an assistant that identifies risk indicators in transcripts of spoken content."},
-                    {"role": "user", "content": prompt}
-                ],
-                "return": {"result": "Risk Analysis Report."}
-            }]
-        )
-        print("Julep risk analysis task created. Waiting for result...")
-        execution = julep_client.executions.create(task_id=task.id, input={})
-        while True:
-            result = julep_client.executions.get(execution.id)
-            if result.status in ["succeeded", "failed"]:
-                break
-            print("Risk analysis processing...")
-            time.sleep(1)
-        if result.status == "succeeded":
-            if "choices" in result.output and len(result.output["choices"]) > 0:
-                risk_report = result.output["choices"][0]["message"]["content"]
-                print("Risk analysis succeeded.")
-            else:
-                print("No 'choices' found in the Julep output.")
-                return ""
+        return completed("")
+    if RISK_PRESCREEN != "off":
+        if news:
+            excerpt, categories = screen_news(transcript_text)
         else:
-            print(f"Julep task failed: {result.error}")
-            return ""
+            excerpt, categories = screen_transcript(transcript_text, utterances)
+        if not excerpt:
+            print("Pre-screen found no risk terms; skipping AI risk analysis.")
+            return completed("No risk indicators found.")
+        print(f"Pre-screen matched {categories}; sending {len(excerpt)} of {len(transcript_text)} characters.")
+        if on_prescreen:
+            on_prescreen(categories)
+        transcript_text = excerpt
+    try:
+        task_registry = get_task_registry()
+        if task_registry is None:
+            print("Julep Agent not initialized. Cannot perform AI risk analysis.")
+            return completed("")
+        execution = task_registry.execute("risk_analysis", transcript_text)
+        print("Julep risk analysis execution started. Waiting for result...")
     except Exception as e:
         print(f"Error during AI risk analysis with Julep: {e}")
+        return completed("")
+
+    def report_of(watching):
+        try:
+            result = watching.result()
+        except Exception as e:
+            print(f"Error during AI risk analysis with Julep: {e}")
+            return ""
+        if result.status != "succeeded":
+            print(f"Julep task failed: {result.error}")
+            return ""
+        if "choices" in result.output and len(result.output["choices"]) > 0:
+            print("Risk analysis succeeded.")
+            return result.output["choices"][0]["message"]["content"]
+        print("No 'choices' found in the Julep output.")
         return ""
+    analyzed = Future()
+    watch_execution(execution.id).add_done_callback(lambda watching: analyzed.set_result(report_of(watching)))
+    return analyzed
+
+@traced("analyze_risks_with_ai", failed=lambda report: not report)
+def analyze_risks_with_ai(transcript_text, output_file=None, utterances=None, on_prescreen=None, news=False):
+    """Risk report for transcript_text via Julep, or "" on failure; see start_risk_analysis()."""
+    risk_report = start_risk_analysis(transcript_text, utterances, on_prescreen, news).result()
+    if not risk_report or output_file is None:
+        return risk_report
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(risk_report)
@@ -179,98 +579,106 @@ def analyze_risks_with_ai(transcript_text, output_file="risk_report.txt"):
         print(f"Error saving risk report to {output_file}: {e}")
     return risk_report
 
+def split_risk_items(risk_report):
+    """Split a report into its list items (numbered or bulleted), keeping any preamble as the first item."""
+    items = []
+    for line in risk_report.splitlines():
+        if not items or re.match(r"\s*(\d+[.)]|[-*•])\s", line):
+            items.append(line)
+        else:
+            items[-1] += "\n" + line
+    return [item.strip("\n") for item in items if item.strip()]
+
+def run_analysis_task(kind, text):
+    """Run one registered Julep task on text. Returns (status, output_text)."""
+    task_registry = get_task_registry()
+    if task_registry is None:
+        raise Exception("Julep Agent not initialized.")
+    execution = task_registry.execute(kind, text)
+    result = wait_for_execution(execution.id)
+    if result.status != "succeeded":
+        print(f"Julep task failed: {result.error}")
+        return result.status, ""
+    if "choices" in result.output and len(result.output["choices"]) > 0:
+        return result.status, result.output["choices"][0]["message"]["content"]
+    return result.status, ""
+
+def analyze_public_chunk(task_kind, chunk):
+    label = page_label(chunk['first_page'], chunk['last_page'])
+    text = chunk.pop('text')
+    if task_kind == "public_company" and COMPANY_EXTRACTOR != "llm":
+        company_names = extract_company_names(text)
+        if company_names is not None:
+            return chunk, ("succeeded", "\n".join(company_names))
+    print(f"Julep task '{task_kind}' started for {label}. Waiting for result...")
+    return chunk, run_analysis_task(task_kind, f"[{label}]\n{text}")
+
+# Summaries analyze_public_records and reduce_public_findings give when no window could be analyzed.
+PUBLIC_RECORDS_FAILED = {
+    "Company extraction failed.", "Risk analysis failed.",
+    "An error occurred during company extraction.", "An error occurred during risk analysis.",
+}
+
+def reduce_public_findings(findings, analysis):
+    """
+    Reduce the per-window findings of one document, a list of
+    (chunk, (status, output_text)), to (summary, result). In company mode the
+    result is the merged company list from merge_company_lists, otherwise the
+    risk report.
+    """
+    succeeded = [(chunk, output_text) for chunk, (status, output_text) in findings if status == "succeeded"]
+
+    if not succeeded:
+        if analysis == "company":
+            return "Company extraction failed.", []
+        else:
+            return "Risk analysis failed.", ""
+    if analysis == "company":
+        companies = merge_company_lists(succeeded)
+        if not companies:
+            return "No companies found.", []
+        summary = "Public record processed successfully."
+        if len(findings) > 1:
+            found = "; ".join(f"{c['name']} ({page_label(c['pages'][0], c['pages'][-1])})" for c in companies)
+            summary += f" Found across {len(findings)} sections: {found}"
+        return summary, companies
+    else:
+        reports = [(chunk, output_text) for chunk, output_text in succeeded if output_text]
+        if not reports:
+            return "No risk indicators found.", ""
+        summary = "Risk analysis completed successfully."
+        if len(reports) == 1:
+            return summary, reports[0][1]
+        combined = "\n\n".join(
+            f"Findings for {page_label(chunk['first_page'], chunk['last_page'])}:\n{output_text}"
+            for chunk, output_text in reports
+        )
+        status, merged = run_analysis_task("public_risk_merge", combined)
+        return summary, merged if status == "succeeded" and merged else combined
+
+@traced("analyze_public_records", failed=lambda result: result[0] in PUBLIC_RECORDS_FAILED)
 def analyze_public_records(file_path, analysis="company"):
     """
     Analyze the uploaded file for public records.
     If analysis="company", extract company names.
     If analysis="risk_single", perform risk analysis on the document (e.g. checking for bankruptcy, fraud, etc.)
     for one company.
+    Large documents are split into overlapping windows that are analyzed
+    concurrently; the per-window findings are then merged with page references.
     """
     try:
-        # Read file contents.
-        if file_path.lower().endswith('.pdf'):
-            import fitz
-            document = fitz.open(file_path)
-            file_content = ""
-            for page in document:
-                file_content += page.get_text()
-            document.close()
-        else:
-            import chardet
-            with open(file_path, 'rb') as f:
-                raw_data = f.read()
-                encoding = chardet.detect(raw_data)['encoding']
-            with open(file_path, 'r', encoding=encoding) as f:
-                file_content = f.read()
-        
+        task_kind = "public_company" if analysis == "company" else "public_risk"
+        # Pages are read lazily and only a couple of windows per worker are held in memory.
+        chunks = chunk_pages(iter_pages(file_path))
+        findings = list(map_bounded(
+            chunk_executor, lambda chunk: analyze_public_chunk(task_kind, chunk), chunks, DOC_CHUNK_WORKERS * 2
+        ))
+        summary, result = reduce_public_findings(findings, analysis)
         if analysis == "company":
-            # Original prompt for company extraction (if needed)
-            prompt = f"""
-            You are an expert in public case analysis. Based on the text excerpt provided below from a public record, identify the companys involved in the case. and just output the companys names
-            
-            Text:
-            {file_content}
-            """
-            task_name = "Public Record Company Extraction"
-        elif analysis == "risk_single":
-            # New prompt for risk analysis on public cases:
-            prompt = f"""
-            You are an expert in analyzing public case documents.
-            Analyze the following document excerpt for risk-related indicators 
-            (such as signs of bankruptcy, fraud, legal investigations, or other controversies) that might affect the reputation or financial stability of the company.
-            Provide a detailed risk analysis report that summarizes the main risk factors.
-            
-            Document:
-            {file_content}
-            """
-            task_name = "Public Record Risk Analysis"
-        
-        task = julep_client.tasks.create(
-            agent_id=agent.id,
-            name=task_name,
-            description=task_name,
-            main=[{
-                "prompt": [
-                    {"role": "system", "content": "You are an assistant specializing in public case risk analysis."},
-                    {"role": "user", "content": prompt}
-                ],
-                "return": {"result": "Risk Analysis Report."}
-            }]
-        )
-        
-        print(f"Julep task '{task_name}' created. Waiting for result...")
-        execution = julep_client.executions.create(task_id=task.id, input={})
-        while True:
-            result = julep_client.executions.get(execution.id)
-            if result.status in ["succeeded", "failed"]:
-                break
-            print("Processing...")
-            time.sleep(1)
-            
-        if result.status == "succeeded":
-            if "choices" in result.output and len(result.output["choices"]) > 0:
-                output_text = result.output["choices"][0]["message"]["content"]
-                if analysis == "company":
-                    # In company mode, we return two company names (if any were extracted).
-                    companies = [line.strip() for line in output_text.splitlines() if line.strip()]
-                    companies = companies[:2]
-                    summary = "Public record processed successfully."
-                    return summary, companies
-                else:
-                    # In risk analysis mode, output the risk report.
-                    summary = "Risk analysis completed successfully."
-                    return summary, output_text
-            else:
-                if analysis == "company":
-                    return "No companies found.", []
-                else:
-                    return "No risk indicators found.", ""
-        else:
-            if analysis == "company":
-                return "Company extraction failed.", []
-            else:
-                return "Risk analysis failed.", ""
-    
+            # In company mode, we return two company names (if any were extracted).
+            return summary, [c['name'] for c in result[:2]]
+        return summary, result
+
     except Exception as e:
         print(f"Error during public records analysis: {e}")
         if analysis == "company":
@@ -278,28 +686,136 @@ def analyze_public_records(file_path, analysis="company"):
         else:
             return "An error occurred during risk analysis.", ""
 
+@traced("analyze_public_batch", failed=lambda result: bool(result[0]) and all(
+    'error' in r or r.get('summary') in PUBLIC_RECORDS_FAILED for r in result[0]))
+def analyze_public_batch(documents, analysis="company"):
+    """
+    Analyze several public records about one counterparty.
+    documents is a list of (name, file_path). Text extraction runs in the
+    process pool, and each document's windows are sent to the model as soon as
+    that document is extracted, so model calls overlap the remaining
+    extraction. Returns (results, merged): one dict per document, in input
+    order, and the merged company list or risk report.
+    """
+    task_kind = "public_company" if analysis == "company" else "public_risk"
+    extract_executor = get_extract_executor()
+    extracting = {
+        extract_executor.submit(extract_chunks, file_path): index
+        for index, (name, file_path) in enumerate(documents)
+    }
+    analyzing = {}
+    results = [{'filename': name} for name, file_path in documents]
+    for future in as_completed(extracting):
+        index = extracting[future]
+        try:
+            chunks = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                discard_extract_executor(extract_executor)
+            print(f"Error extracting text from {documents[index][0]}: {e}")
+            results[index].update(summary="Text extraction failed.", error=str(e))
+            continue
+        print(f"Extracted {documents[index][0]} into {len(chunks)} sections.")
+        analyzing[index] = [chunk_executor.submit(analyze_public_chunk, task_kind, chunk) for chunk in chunks]
+
+    # Reduce each document once its windows are in; risk merges run concurrently.
+    reducing = {}
+    for index, futures in sorted(analyzing.items()):
+        findings = []
+        for future in futures:
+            try:
+                findings.append(future.result())
+            except Exception as e:
+                print(f"Error analyzing a section of {documents[index][0]}: {e}")
+                findings.append((None, ("failed", "")))
+        reducing[index] = chunk_executor.submit(reduce_public_findings, findings, analysis)
+    for index, future in reducing.items():
+        try:
+            summary, result = future.result()
+        except Exception as e:
+            print(f"Error during public records analysis of {documents[index][0]}: {e}")
+            results[index].update(summary="An error occurred during analysis.", error=str(e))
+            continue
+        results[index]['summary'] = summary
+        if analysis == "company":
+            results[index]['companies'] = result
+        else:
+            results[index]['risk_report'] = result
+
+    if analysis == "company":
+        return results, merge_document_companies(
+            (r['filename'], r.get('companies', [])) for r in results
+        )
+    reports = [r for r in results if r.get('risk_report')]
+    if len(reports) <= 1:
+        return results, reports[0]['risk_report'] if reports else ""
+    combined = "\n\n".join(f"Findings for {r['filename']}:\n{r['risk_report']}" for r in reports)
+    try:
+        status, merged = run_analysis_task("public_risk_batch_merge", combined)
+    except Exception as e:
+        print(f"Error merging risk reports: {e}")
+        status, merged = "failed", ""
+    return results, merged if status == "succeeded" and merged else combined
+
 
 def build_search_query(company_name: str, legal_keywords: list) -> str:
     keywords_query = " OR ".join(legal_keywords)
     full_query = f'"{company_name}" ({keywords_query})'
     return full_query
 
+@traced("search_company_news", failed=lambda data: data is None)
 def search_company_news(query: str):
-    url = "https://serpapi.com/search.json"
+    """SerpAPI news search, served from the news cache when the query ran within NEWS_CACHE_TTL."""
+    return news_cache.get_or_fetch(query, lambda: fetch_company_news(query))
+
+def fetch_company_news(query: str):
+    url = SERPAPI_URL
     params = {
         "engine": "google_news",
         "q": query,
         "gl": "us",
         "hl": "en",
-        "api_key": SERPAPI_KEY
+        "api_key": require_key("SERPAPI_KEY")
     }
     print(f"Searching news for query: {query}")
-    response = requests.get(url, params=params)
+    response = api_call("serpapi", lambda: http_session.get(url, params=params))
     if response.status_code != 200:
         print(f"Error: Received status code {response.status_code}")
         return None
+    add_bytes("search_company_news", len(response.content))
     return response.json()
 
+def normalize_link(link):
+    """Canonical form of an article URL: lowercase host, no fragment, tracking parameters or trailing slash."""
+    parts = urlsplit(link.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       parts.netloc.lower().removeprefix("www."), parts.path.rstrip("/"), query, ""))
+
+def dedupe_news_results(datasets):
+    """
+    Drop articles already seen earlier in datasets (a list of SerpAPI
+    responses, e.g. one per company), comparing normalized links. Returns new
+    response dicts; the inputs, which may be shared cache entries, are untouched.
+    """
+    seen = set()
+    deduped = []
+    for data in datasets:
+        if not data or "news_results" not in data:
+            deduped.append(data)
+            continue
+        news_results = []
+        for result in data["news_results"]:
+            link = result.get("link")
+            key = normalize_link(link) if link else None
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+            news_results.append(result)
+        deduped.append({**data, "news_results": news_results})
+    return deduped
+
 def display_news_results(data):
     if "news_results" not in data:
         return "No news results found."
@@ -319,33 +835,63 @@ def display_news_results(data):
     return "\n".join(results)
     
 def extract_company_names(text):
-    import re
-    pattern = r'\b[A-Z][a-zA-Z0-9&.\' ]+\b'
-    company_names = re.findall(pattern, text)
-    return list(set(company_names))
+    """
+    Company names found in text by the local extractor, or None when the
+    model should read the text itself ("hybrid" mode with no candidates).
+    Low-confidence candidates are dropped in "local" mode and sent to the
+    model for confirmation in "hybrid" mode.
+    """
+    candidates = get_extractor().extract(text)
+    if COMPANY_EXTRACTOR == "hybrid" and not candidates:
+        return None
+    unsure = [c for c in candidates if c['confidence'] < COMPANY_CONFIDENCE]
+    confirmed = {}
+    if COMPANY_EXTRACTOR == "hybrid" and unsure:
+        confirmed = confirm_company_candidates(unsure)
+    names = []
+    for candidate in candidates:
+        if candidate['confidence'] >= COMPANY_CONFIDENCE:
+            names.append(candidate['name'])
+        elif candidate['key'] in confirmed:
+            names.append(confirmed[candidate['key']])
+    return names
+
+def confirm_company_candidates(candidates):
+    """
+    Ask the model which candidates are companies, showing it only their
+    sentences. Returns {candidate key: name} for those it kept, where the name
+    may have had leading words trimmed but never gains any.
+    """
+    listing = "\n".join(f"- {c['name']}: {c['context']}" for c in candidates)
+    try:
+        status, output_text = run_analysis_task("company_confirm", listing)
+    except Exception as e:
+        print(f"Error confirming company candidates: {e}")
+        return {}
+    if status != "succeeded":
+        return {}
+    confirmed = {}
+    for line in output_text.splitlines():
+        name = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).replace("**", "").strip()
+        key = normalize_name(name)
+        if not key:
+            continue
+        for candidate in candidates:
+            if candidate['key'] == key or candidate['key'].endswith(" " + key):
+                confirmed.setdefault(candidate['key'], name)
+                break
+    return confirmed
 
 if __name__ == "__main__":
     url = input("Enter the TikTok, Instagram, or X/Twitter video URL: ").strip()
     try:
-        video_file = download_video(url)
-        if not video_file:
-            exit()
-        audio_file = extract_audio(video_file)
-        if not audio_file:
-            exit()
-        audio_url = upload_file(audio_file)
-        transcript_id = request_transcript(audio_url)
-        print(f"Transcription requested. Transcript ID: {transcript_id}")
-        transcript_json = poll_transcript(transcript_id)
+        transcript_json = transcribe_url(url, os.getcwd())
         transcript_filename = "transcript.txt"
         save_transcript_text(transcript_json, transcript_filename)
-        try:
-            with open(transcript_filename, 'r', encoding='utf-8') as f:
-                transcript_text = f.read()
-        except Exception as e:
-            print(f"Error reading transcript file {transcript_filename}: {e}")
-            transcript_text = ""
-        risk_report = analyze_risks_with_ai(transcript_text)
+        transcript_text = format_transcript_text(transcript_json)
+        risk_report = analyze_risks_with_ai(
+            transcript_text, output_file="risk_report.txt", utterances=transcript_json.get("utterances")
+        )
         print("AI-Generated Risk Analysis Report:")
         print(risk_report)
     except Exception as e:
@@ -0,0 +1,142 @@
+# metrics.py
+import bisect
+import functools
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    In-process metrics rendered in the Prometheus text format.
+    Recording is a dict lookup and a few additions under one lock, cheap
+    enough to leave on for every stage call.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name, fn):
+        """Register fn() -> {labels tuple: value}, evaluated at scrape time."""
+        self._gauges[name] = fn
+
+    def render(self):
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            histograms = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+        for (name, labels), counts, total, count, buckets in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{fmt(labels)} {total}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for name, fn in sorted(self._gauges.items()):
+            header(name, "gauge")
+            for labels, value in fn().items():
+                lines.append(f"{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("riskradar_stage_duration_seconds", "Wall time of each pipeline stage call.")
+registry.describe("riskradar_stage_errors_total", "Stage calls that raised or returned a failed result.")
+registry.describe("riskradar_stage_bytes_total", "Bytes downloaded, written or uploaded by a stage.")
+registry.describe("riskradar_polls_total", "Status checks made while waiting on remote jobs.")
+
+
+def traced(stage, failed=None):
+    """
+    Record the duration of every call to the wrapped stage, and count failures:
+    calls that raise, and for stages that report failure in their return value,
+    calls whose result failed(result) is true.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = failed is not None and failed(result)
+                return result
+            finally:
+                registry.observe("riskradar_stage_duration_seconds", {"stage": stage}, time.perf_counter() - start)
+                if error:
+                    registry.inc("riskradar_stage_errors_total", {"stage": stage})
+        return wrapper
+    return decorator
+
+
+def traced_future(stage, future, failed=None):
+    """Time a stage that finishes in the background, from now until future is done, counting failures as traced() does."""
+    start = time.perf_counter()
+    def record(done):
+        registry.observe("riskradar_stage_duration_seconds", {"stage": stage}, time.perf_counter() - start)
+        error = done.exception() is not None or (failed is not None and failed(done.result()))
+        if error:
+            registry.inc("riskradar_stage_errors_total", {"stage": stage})
+    future.add_done_callback(record)
+    return future
+
+
+def add_bytes(stage, amount):
+    registry.inc("riskradar_stage_bytes_total", {"stage": stage}, amount)
+
+
+def count_poll(kind):
+    registry.inc("riskradar_polls_total", {"kind": kind})
@@ -0,0 +1,317 @@
+# monitor.py
+"""
+Watchlist monitoring: companies are searched for news on a schedule and only
+articles not seen in an earlier sweep are sent for risk analysis.
+
+    python monitor.py add "Acme Solar LLC" "Northwind Energy Inc"
+    python monitor.py add --file companies.txt
+    python monitor.py list
+    python monitor.py run            # sweep every MONITOR_INTERVAL seconds
+    python monitor.py run --once
+
+Each sweep checks at most MONITOR_MAX_SEARCHES of the companies that are due,
+oldest check first, so SerpAPI and Julep calls per sweep stay bounded however
+long the watchlist grows. Risk reports on new articles are appended to the
+MONITOR_ALERTS file.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import (
+    build_search_query,
+    fetch_company_news,
+    normalize_link,
+    display_news_results,
+    analyze_risks_with_ai
+)
+from reports import report_store
+from ratelimit import lane
+
+MONITOR_DB = os.getenv("MONITOR_DB", os.path.join("cache", "monitor.sqlite3"))
+MONITOR_ALERTS = os.getenv("MONITOR_ALERTS", os.path.join("cache", "alerts.jsonl"))
+# Seconds between checks of the same company.
+MONITOR_INTERVAL = int(os.getenv("MONITOR_INTERVAL", 3600))
+MONITOR_MAX_SEARCHES = int(os.getenv("MONITOR_MAX_SEARCHES", 500))
+MONITOR_WORKERS = int(os.getenv("MONITOR_WORKERS", 8))
+# Seen articles older than this are forgotten; search results rarely reach that far back.
+MONITOR_SEEN_DAYS = int(os.getenv("MONITOR_SEEN_DAYS", 30))
+LEGAL_KEYWORDS = ["bankruptcy", "lawsuit", "fraud"]
+NO_RISK = "No risk indicators found."
+
+
+def content_hash(result):
+    """Hash of an article's normalized title and source, so a story syndicated under several links counts once."""
+    title = re.sub(r'[^a-z0-9]+', ' ', result.get("title", "").casefold()).strip()
+    source = result.get("source", {}).get("name", "").casefold()
+    return hashlib.sha1(f"{title}|{source}".encode('utf-8')).hexdigest()
+
+
+class WatchlistStore:
+    """The watchlist and the seen-article index, in one SQLite file."""
+    def __init__(self, path=MONITOR_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watchlist (
+                company TEXT PRIMARY KEY, added REAL, last_checked REAL, next_check REAL
+            );
+            CREATE INDEX IF NOT EXISTS watchlist_due ON watchlist (next_check);
+            CREATE TABLE IF NOT EXISTS seen_articles (
+                company TEXT, link TEXT, content_hash TEXT, first_seen REAL,
+                PRIMARY KEY (company, link)
+            );
+            CREATE INDEX IF NOT EXISTS seen_by_hash ON seen_articles (company, content_hash);
+            CREATE INDEX IF NOT EXISTS seen_by_age ON seen_articles (first_seen);
+        """)
+
+    def add(self, companies):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO watchlist (company, added, last_checked, next_check) VALUES (?, ?, NULL, ?)",
+                [(company, now, now) for company in companies]
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def remove(self, companies):
+        with self._lock:
+            cursor = self._conn.executemany("DELETE FROM watchlist WHERE company = ?", [(c,) for c in companies])
+            self._conn.executemany("DELETE FROM seen_articles WHERE company = ?", [(c,) for c in companies])
+            self._conn.commit()
+            return cursor.rowcount
+
+    def companies(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT company, added, last_checked, next_check FROM watchlist ORDER BY company"
+            ).fetchall()
+        return [dict(zip(('company', 'added', 'last_checked', 'next_check'), row)) for row in rows]
+
+    def size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM watchlist").fetchone()[0]
+
+    def due(self, now, limit):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT company FROM watchlist WHERE next_check <= ? ORDER BY next_check LIMIT ?", (now, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def checked(self, company, next_check):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE watchlist SET last_checked = ?, next_check = ? WHERE company = ?",
+                (time.time(), next_check, company)
+            )
+            self._conn.commit()
+
+    def unseen(self, company, articles):
+        """The articles (a list of (link, content_hash, result)) not yet seen for company by link or content."""
+        with self._lock:
+            fresh = []
+            digests = set()
+            for link, digest, result in articles:
+                if digest in digests:
+                    continue
+                digests.add(digest)
+                row = self._conn.execute(
+                    "SELECT 1 FROM seen_articles WHERE company = ? AND (link = ? OR content_hash = ?) LIMIT 1",
+                    (company, link, digest)
+                ).fetchone()
+                if row is None:
+                    fresh.append((link, digest, result))
+            return fresh
+
+    def mark_seen(self, company, articles):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_articles (company, link, content_hash, first_seen) VALUES (?, ?, ?, ?)",
+                [(company, link, digest, now) for link, digest, result in articles]
+            )
+            self._conn.commit()
+
+    def forget_before(self, cutoff):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM seen_articles WHERE first_seen < ?", (cutoff,))
+            self._conn.commit()
+            return cursor.rowcount
+
+
+class AlertSink:
+    """Appends one JSON line per alert to a local file."""
+    def __init__(self, path=MONITOR_ALERTS):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, alert):
+        line = json.dumps(alert) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        print(f"[alert] {alert['company']}: {len(alert['articles'])} new articles")
+
+    def recent(self, limit=50):
+        """The last limit alerts, newest first, read from the end of the file."""
+        if not os.path.exists(self.path):
+            return []
+        with self._lock, open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= limit:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = [line for line in data.split(b"\n") if line.strip()]
+        return [json.loads(line) for line in reversed(lines[-limit:])]
+
+
+class Monitor:
+    def __init__(self, store=None, sink=None, interval=MONITOR_INTERVAL, max_searches=MONITOR_MAX_SEARCHES,
+                 workers=MONITOR_WORKERS):
+        self.store = store or WatchlistStore()
+        self.sink = sink or AlertSink()
+        self.interval = interval
+        self.max_searches = max_searches
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="monitor")
+        self.last_sweep = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def check(self, company):
+        """Search one company and analyze the articles it has not seen. Returns (new articles, analyzed, alerted)."""
+        # Straight to SerpAPI: NEWS_CACHE_TTL is on the order of the interval, so a cached result
+        # would often be the previous sweep's and hide new articles for another interval.
+        data = fetch_company_news(build_search_query(company, LEGAL_KEYWORDS))
+        # Spread the next checks so a watchlist added at once does not stay in lockstep.
+        next_check = time.time() + self.interval * random.uniform(0.9, 1.1)
+        if data is None:
+            self.store.checked(company, next_check)
+            raise Exception("news search failed")
+        articles = []
+        for result in data.get("news_results", []):
+            link = result.get("link")
+            if link:
+                articles.append((normalize_link(link), content_hash(result), result))
+        fresh = self.store.unseen(company, articles)
+        if not fresh:
+            self.store.checked(company, next_check)
+            return 0, False, False
+        formatted_news = display_news_results({"news_results": [result for link, digest, result in fresh]})
+        risk_report = analyze_risks_with_ai(formatted_news, output_file=None, news=True)
+        if not risk_report:
+            # Analysis failed; leave the articles unseen so the next check retries them.
+            self.store.checked(company, next_check)
+            return len(fresh), True, False
+        self.store.mark_seen(company, fresh)
+        self.store.checked(company, next_check)
+        report_store.put('news', formatted_news, company=company, metadata={'monitor': True})
+        report_store.put('risk_report', risk_report, company=company, metadata={'monitor': True})
+        alerted = risk_report != NO_RISK
+        if alerted:
+            self.sink.send({
+                'company': company,
+                'time': time.time(),
+                'articles': [
+                    {'title': r.get("title"), 'link': r.get("link"), 'date': r.get("date")}
+                    for link, digest, r in fresh
+                ],
+                'risk_report': risk_report
+            })
+        return len(fresh), True, alerted
+
+    def sweep(self):
+        start = time.time()
+        due = self.store.due(start, self.max_searches)
+        summary = {'due': len(due), 'new_articles': 0, 'analyses': 0, 'alerts': 0, 'errors': 0}
+
+        def safe_check(company):
+            try:
+                with lane("monitor"):
+                    return self.check(company)
+            except Exception as e:
+                print(f"Error checking {company}: {e}")
+                return None
+        for outcome in self.executor.map(safe_check, due):
+            if outcome is None:
+                summary['errors'] += 1
+                continue
+            new_articles, analyzed, alerted = outcome
+            summary['new_articles'] += new_articles
+            summary['analyses'] += analyzed
+            summary['alerts'] += alerted
+        summary['forgotten'] = self.store.forget_before(time.time() - MONITOR_SEEN_DAYS * 86400)
+        summary['seconds'] = round(time.time() - start, 3)
+        self.last_sweep = summary
+        print(f"Monitor sweep: {summary}")
+        return summary
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Monitor sweep failed: {e}")
+            # Wake up when the next company is due, but at least every few seconds and at most every minute.
+            self._stop.wait(min(60, max(5, self.interval / 10)))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('add', 'remove'):
+        command = commands.add_parser(name)
+        command.add_argument('companies', nargs='*')
+        command.add_argument('--file', help="file with one company per line")
+    commands.add_parser('list')
+    run = commands.add_parser('run')
+    run.add_argument('--once', action='store_true', help="run one sweep and exit")
+    args = parser.parse_args()
+
+    store = WatchlistStore()
+    if args.command in ('add', 'remove'):
+        companies = list(args.companies)
+        if args.file:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                companies += [line.strip() for line in f if line.strip()]
+        changed = store.add(companies) if args.command == 'add' else store.remove(companies)
+        print(f"{args.command}: {changed} of {len(companies)} companies changed; watching {store.size()}")
+    elif args.command == 'list':
+        for entry in store.companies():
+            print(entry['company'])
+    elif args.once:
+        print(json.dumps(Monitor(store).sweep(), indent=2))
+    else:
+        Monitor(store).run()
+
+
+if __name__ == '__main__':
+    main()
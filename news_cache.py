@@ -0,0 +1,97 @@
+# news_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+NEWS_CACHE_DB = os.getenv("NEWS_CACHE_DB", os.path.join("cache", "news.sqlite3"))
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", 3600))
+
+
+class NewsCache:
+    """
+    SerpAPI responses keyed by query string, kept in SQLite so they survive
+    restarts. get_or_fetch() is single-flight: concurrent callers asking for
+    the same query share one upstream request.
+    """
+    def __init__(self, path=NEWS_CACHE_DB, ttl=NEWS_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS news_queries (query TEXT PRIMARY KEY, fetched REAL, data TEXT)"
+            )
+        return self._conn
+
+    def get(self, query):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM news_queries WHERE query = ? AND fetched > ?",
+                (query, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, query, data):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO news_queries (query, fetched, data) VALUES (?, ?, ?)",
+                (query, time.time(), json.dumps(data))
+            )
+            conn.execute("DELETE FROM news_queries WHERE fetched <= ?", (time.time() - self.ttl,))
+            conn.commit()
+
+    def get_or_fetch(self, query, fetch):
+        data = self.get(query)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+            return data
+        with self._lock:
+            future = self._inflight.get(query)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[query] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not leader:
+            return future.result()
+        try:
+            data = fetch()
+            if data is not None:
+                self.put(query, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[query]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+news_cache = NewsCache()
@@ -0,0 +1,170 @@
+# poller.py
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from metrics import count_poll
+
+POLLER_WORKERS = int(os.getenv("POLLER_WORKERS", 8))
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", 0.5))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", 15))
+POLL_BACKOFF = 1.5
+POLL_JITTER = 0.2
+
+
+class _Watch:
+    def __init__(self, key, check, future, interval, deadline):
+        self.key = key
+        self.check = check
+        self.future = future
+        self.interval = interval
+        self.deadline = deadline
+        self.generation = 0
+        self.running = False
+        self.notified = False
+        self.checks = 0
+
+
+class Poller:
+    """
+    One scheduler thread for every outstanding remote job.
+    watch() registers a check() callable that returns None while the job is
+    pending and the final result once it is done; the caller gets a Future.
+    Checks run on a small executor, so hundreds of watched jobs cost a heap
+    entry each rather than a sleeping thread. Intervals start from the
+    expected duration, grow by POLL_BACKOFF with jitter up to max_interval,
+    and the future fails with TimeoutError once the deadline passes.
+    notify(key) makes a watch due immediately (e.g. from a webhook).
+    """
+    def __init__(self, workers=POLLER_WORKERS, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL):
+        self.workers = workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._heap = []
+        self._watches = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self.total_checks = 0
+
+    def _start(self):
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="poller-check")
+            self._thread = threading.Thread(target=self._run, name="poller", daemon=True)
+            self._thread.start()
+
+    def _schedule(self, watch, delay):
+        watch.generation += 1
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), watch.generation, watch))
+        self._cond.notify()
+
+    def watch(self, key, check, expected_duration=None, deadline=1800):
+        future = Future()
+        if expected_duration:
+            first_delay = min(self.max_interval, max(self.min_interval, expected_duration / 2))
+        else:
+            first_delay = self.min_interval
+        with self._cond:
+            self._start()
+            watch = _Watch(key, check, future, first_delay, time.monotonic() + deadline)
+            self._watches[key] = watch
+            self._schedule(watch, first_delay)
+        return future
+
+    def notify(self, key):
+        with self._cond:
+            watch = self._watches.get(key)
+            if watch is None:
+                return False
+            if watch.running:
+                watch.notified = True
+            else:
+                self._schedule(watch, 0)
+            return True
+
+    def stats(self):
+        with self._cond:
+            return {'watching': len(self._watches), 'total_checks': self.total_checks}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, generation, watch = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if generation != watch.generation or watch.future.done():
+                    continue
+                watch.running = True
+            self._executor.submit(self._check, watch)
+
+    def _finish(self, watch):
+        with self._cond:
+            if self._watches.get(watch.key) is watch:
+                del self._watches[watch.key]
+
+    def _check(self, watch):
+        count_poll(watch.key.split(":", 1)[0])
+        try:
+            result = watch.check()
+        except Exception as e:
+            self._finish(watch)
+            watch.future.set_exception(e)
+            return
+        with self._cond:
+            watch.checks += 1
+            self.total_checks += 1
+        if result is not None:
+            self._finish(watch)
+            watch.future.set_result(result)
+            return
+        now = time.monotonic()
+        if now >= watch.deadline:
+            self._finish(watch)
+            watch.future.set_exception(TimeoutError(f"Gave up waiting on {watch.key} after {watch.checks} checks"))
+            return
+        with self._cond:
+            watch.running = False
+            if watch.notified:
+                watch.notified = False
+                self._schedule(watch, 0)
+                return
+            watch.interval = min(self.max_interval, watch.interval * POLL_BACKOFF)
+            delay = watch.interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+            self._schedule(watch, min(delay, watch.deadline - now))
+
+
+def completed(result):
+    """A Future that is already done with result, for callers that expect one."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def chain(future, fn):
+    """
+    Future of fn(future.result()), computed from future's done callback; an
+    exception from either ends up on the returned future. fn runs on
+    whichever thread completes future, so it must return quickly.
+    """
+    chained = Future()
+    def done(source):
+        try:
+            result = fn(source.result())
+        except Exception as e:
+            chained.set_exception(e)
+            return
+        chained.set_result(result)
+    future.add_done_callback(done)
+    return chained
+
+
+poller = Poller()
@@ -0,0 +1,160 @@
+# prescreen.py
+import json
+import os
+import re
+from collections import deque
+
+# "off" sends every transcript to the model unchanged.
+RISK_PRESCREEN = os.getenv("RISK_PRESCREEN", "on")
+# Optional JSON file of {"category": ["term", ...]} replacing the default lexicon.
+RISK_LEXICON_FILE = os.getenv("RISK_LEXICON_FILE")
+# Segments of context kept on each side of a matching segment.
+PRESCREEN_CONTEXT = int(os.getenv("PRESCREEN_CONTEXT", 1))
+
+DEFAULT_LEXICON = {
+    "bankruptcy": ["bankruptcy", "bankrupt", "chapter 11", "chapter 7", "insolvency", "insolvent",
+                   "receivership", "liquidation", "creditors", "default", "defaulted"],
+    "fraud": ["fraud", "fraudulent", "scam", "ponzi", "embezzlement", "embezzled", "misappropriation",
+              "money laundering", "bribery", "kickback", "falsified", "forgery"],
+    "lawsuit": ["lawsuit", "sued", "suing", "litigation", "class action", "plaintiff", "defendant",
+                "settlement", "injunction", "complaint filed", "court"],
+    "investigation": ["investigation", "investigated", "probe", "subpoena", "indicted", "indictment",
+                      "charged", "arrested", "sec", "doj", "regulator", "whistleblower"],
+    "financial instability": ["layoffs", "losses", "debt", "downgrade", "missed payment", "cash crunch",
+                              "going concern", "restatement", "delisted", "write-down"],
+    "controversy": ["scandal", "controversy", "allegation", "allegations", "accused", "boycott",
+                    "backlash", "misconduct", "harassment", "dispute", "violation", "penalty", "fined"]
+}
+
+
+def load_lexicon(path=RISK_LEXICON_FILE):
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class RiskMatcher:
+    """
+    Aho-Corasick automaton over every lexicon term, so a transcript is
+    scanned once no matter how many terms there are. Matching is
+    case-insensitive and only whole words count.
+    """
+    def __init__(self, lexicon):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for category, terms in lexicon.items():
+            for term in terms:
+                self._add(term.lower(), category)
+        self._build()
+
+    def _add(self, term, category):
+        state = 0
+        for char in term:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append((term, category))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """Return a list of (term, category) for every whole-word match in text."""
+        text = text.lower()
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for term, category in self._output[state]:
+                start = i - len(term) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if i + 1 < len(text) and text[i + 1].isalnum():
+                    continue
+                matches.append((term, category))
+        return matches
+
+
+_matcher = None
+
+
+def get_matcher():
+    global _matcher
+    if _matcher is None:
+        _matcher = RiskMatcher(load_lexicon())
+    return _matcher
+
+
+def split_segments(text):
+    return [segment.strip() for segment in re.split(r'(?<=[.!?])\s+|\n+', text) if segment.strip()]
+
+
+def screen_segments(segments, context=PRESCREEN_CONTEXT):
+    """
+    Score each segment by its lexicon matches and keep the matching ones plus
+    `context` neighbours on each side. Returns (excerpt, categories); the
+    excerpt is empty when nothing matched.
+    """
+    matcher = get_matcher()
+    keep = set()
+    categories = {}
+    for i, segment in enumerate(segments):
+        matches = matcher.find(segment)
+        if not matches:
+            continue
+        for _, category in matches:
+            categories[category] = categories.get(category, 0) + 1
+        keep.update(range(max(0, i - context), min(len(segments), i + context + 1)))
+    windows = []
+    previous = None
+    for i in sorted(keep):
+        if previous is not None and i == previous + 1:
+            windows[-1].append(segments[i])
+        else:
+            windows.append([segments[i]])
+        previous = i
+    excerpt = "\n...\n".join("\n".join(window) for window in windows)
+    return excerpt, categories
+
+
+def split_news_results(formatted_news):
+    """The articles of display_news_results() output, one "Result i:" block each."""
+    return [block.strip() for block in re.split(r'\n\s*\n', formatted_news) if block.strip()]
+
+
+def screen_news(formatted_news):
+    """
+    Pre-screen formatted news one article at a time, so a match in a title
+    keeps the article's source, date and link. Neighbouring articles are
+    unrelated, so no context is kept around a match.
+    """
+    return screen_segments(split_news_results(formatted_news), context=0)
+
+
+def screen_transcript(transcript_text, utterances=None):
+    """
+    Pre-screen a transcript before it goes to the model. With AssemblyAI
+    utterances each segment is one speaker turn, so the excerpt keeps
+    "Speaker X:" attribution.
+    """
+    if utterances:
+        segments = [f"Speaker {u.get('speaker', 'N/A')}: {u.get('text', '')}" for u in utterances]
+    else:
+        segments = split_segments(transcript_text)
+    return screen_segments(segments)
@@ -0,0 +1,202 @@
+# ratelimit.py
+import contextlib
+import functools
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import requests
+
+from metrics import registry
+
+# Requests per second (0 = unlimited) and calls in flight allowed per provider.
+PROVIDER_LIMITS = {
+    "assemblyai": (float(os.getenv("ASSEMBLYAI_RATE_LIMIT", 20)), int(os.getenv("ASSEMBLYAI_MAX_CONCURRENCY", 32))),
+    "serpapi": (float(os.getenv("SERPAPI_RATE_LIMIT", 5)), int(os.getenv("SERPAPI_MAX_CONCURRENCY", 8))),
+    "julep": (float(os.getenv("JULEP_RATE_LIMIT", 10)), int(os.getenv("JULEP_MAX_CONCURRENCY", 16))),
+}
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", 4))
+API_RETRY_BASE = float(os.getenv("API_RETRY_BASE", 0.5))
+API_RETRY_MAX = float(os.getenv("API_RETRY_MAX", 30))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# When callers queue for a provider, lower lanes go first: web requests ahead of batch runs and the monitor.
+LANES = {"interactive": 0, "batch": 1, "monitor": 2}
+
+_lane = threading.local()
+registry.describe("riskradar_api_wait_seconds", "Time calls waited for a provider's rate limit or concurrency cap.")
+registry.describe("riskradar_api_retries_total", "Provider calls retried after a 429, 5xx or connection error.")
+
+
+def current_lane():
+    return getattr(_lane, 'name', "interactive")
+
+
+@contextlib.contextmanager
+def lane(name):
+    """Run the enclosed API calls in the given priority lane."""
+    previous = current_lane()
+    _lane.name = name
+    try:
+        yield
+    finally:
+        _lane.name = previous
+
+
+def in_current_lane(fn):
+    """Wrap fn so it runs in the caller's lane from whichever thread ends up calling it (e.g. poller checks)."""
+    name = current_lane()
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with lane(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class ProviderLimiter:
+    """
+    Token bucket of `rate` requests per second (bursting up to one second's
+    worth) plus a cap of `concurrency` calls in flight. Waiting callers are
+    admitted strictly by lane, then in arrival order. pause() holds everyone
+    back after the provider answers 429.
+    """
+    def __init__(self, name, rate, concurrency):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self.concurrency = concurrency
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def _wait_time(self, now):
+        """Seconds until the caller at the head of the queue may go, or None to wait for a release."""
+        if self._in_flight >= self.concurrency:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+        return 0
+
+    def acquire(self):
+        lane_name = current_lane()
+        entry = (LANES.get(lane_name, 0), next(self._sequence))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = self._wait_time(time.monotonic()) if self._waiters[0] == entry else None
+                    if wait == 0:
+                        break
+                    self._cond.wait(wait)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            if self.rate > 0:
+                self._tokens -= 1
+            self._in_flight += 1
+            # The next caller in line may be able to go as well.
+            self._cond.notify_all()
+        registry.observe("riskradar_api_wait_seconds", {"provider": self.name, "lane": lane_name},
+                         time.monotonic() - start)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0)
+
+    def stats(self):
+        with self._cond:
+            return {'in_flight': self._in_flight, 'waiting': len(self._waiters)}
+
+
+limiters = {name: ProviderLimiter(name, rate, concurrency) for name, (rate, concurrency) in PROVIDER_LIMITS.items()}
+
+
+def status_of(outcome):
+    """HTTP status of a requests.Response, or of an exception raised by requests or the Julep SDK."""
+    status = getattr(outcome, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(outcome, 'response', None), 'status_code', None)
+    return status
+
+
+def is_transient(outcome):
+    """Whether a response or exception is worth retrying: 429, a gateway or server hiccup, or a dropped connection."""
+    status = status_of(outcome)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(outcome, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return type(outcome).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after(outcome):
+    response = outcome if hasattr(outcome, 'headers') else getattr(outcome, 'response', None)
+    try:
+        return min(API_RETRY_MAX, float(response.headers.get("Retry-After")))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def api_call(provider, fn, idempotent=True, retries=None):
+    """
+    Run fn() under the provider's limiter and retry it with jittered
+    exponential backoff while it returns or raises something transient.
+    Calls that are not idempotent (creating a transcript or an execution) are
+    only retried on 429, when the provider has not acted on the request.
+    Returns fn's last result or raises its last exception.
+    """
+    limiter = limiters[provider]
+    retries = API_MAX_RETRIES if retries is None else retries
+    attempt = 0
+    while True:
+        error = None
+        result = None
+        with limiter.slot():
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+        outcome = error if error is not None else result
+        status = status_of(outcome)
+        if status == 429:
+            limiter.pause(retry_after(outcome) or API_RETRY_BASE)
+        retryable = status == 429 if not idempotent else is_transient(outcome)
+        if not retryable or attempt >= retries:
+            if error is not None:
+                raise error
+            return result
+        delay = retry_after(outcome) or random.uniform(0, min(API_RETRY_MAX, API_RETRY_BASE * 2 ** attempt))
+        attempt += 1
+        reason = str(status) if status else type(error).__name__
+        registry.inc("riskradar_api_retries_total", {"provider": provider, "reason": reason})
+        print(f"{provider} call failed ({reason}); retry {attempt}/{retries} in {delay:.1f}s.")
+        time.sleep(delay)
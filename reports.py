@@ -0,0 +1,294 @@
+# reports.py
+"""
+Every transcript, news bundle and analysis result, kept in SQLite with an
+FTS5 index over the text so past work can be searched and looked up by
+company.
+
+    python reports.py search "chapter 11"
+    python reports.py latest "Acme Solar LLC"
+    python reports.py compact
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from companies import normalize_name
+
+REPORT_DB = os.getenv("REPORT_DB", os.path.join("cache", "reports.sqlite3"))
+# 0 keeps records forever.
+REPORT_RETENTION_DAYS = int(os.getenv("REPORT_RETENTION_DAYS", 0))
+# Seconds between background compactions (retention, FTS merge, freeing pages).
+REPORT_COMPACT_INTERVAL = int(os.getenv("REPORT_COMPACT_INTERVAL", 3600))
+
+KINDS = ("transcript", "news", "risk_report", "companies")
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS reports (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        company TEXT,
+        company_key TEXT,
+        source TEXT,
+        doc_hash TEXT,
+        content_hash TEXT NOT NULL,
+        created REAL NOT NULL,
+        updated REAL NOT NULL,
+        content TEXT NOT NULL,
+        metadata TEXT
+    );
+    CREATE INDEX IF NOT EXISTS reports_by_company ON reports (company_key, kind, updated);
+    CREATE INDEX IF NOT EXISTS reports_by_source ON reports (source, kind, updated);
+    CREATE INDEX IF NOT EXISTS reports_by_doc ON reports (doc_hash);
+    CREATE INDEX IF NOT EXISTS reports_by_content ON reports (content_hash);
+    CREATE INDEX IF NOT EXISTS reports_by_age ON reports (updated);
+    CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+        content, company, source, content='reports', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS reports_fts_insert AFTER INSERT ON reports BEGIN
+        INSERT INTO reports_fts (rowid, content, company, source) VALUES (new.id, new.content, new.company, new.source);
+    END;
+    CREATE TRIGGER IF NOT EXISTS reports_fts_delete AFTER DELETE ON reports BEGIN
+        INSERT INTO reports_fts (reports_fts, rowid, content, company, source)
+        VALUES ('delete', old.id, old.content, old.company, old.source);
+    END;
+"""
+SUMMARY_COLUMNS = "id, kind, company, source, doc_hash, created, updated, metadata"
+
+
+def file_hash(file_path, chunk_size=1048576):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data: break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word, so user input can never be a syntax error."""
+    words = re.findall(r"\w+", text)
+    return " AND ".join(f'"{word}"' for word in words)
+
+
+def _row(row, with_content=False):
+    record = {
+        'id': row[0],
+        'kind': row[1],
+        'company': row[2],
+        'source': row[3],
+        'doc_hash': row[4],
+        'created': row[5],
+        'updated': row[6],
+        'metadata': json.loads(row[7]) if row[7] else None
+    }
+    if with_content:
+        record['content'] = row[8]
+    return record
+
+
+class ReportStore:
+    """
+    Writes go through one connection under a lock; reads use a connection
+    per thread, which WAL mode lets run alongside writes. Storing content
+    that is already there (same kind, text, company and source) only
+    refreshes its timestamp, so re-analyzing a cached transcript or
+    re-running a search adds nothing.
+    """
+    def __init__(self, path=REPORT_DB, retention_days=REPORT_RETENTION_DAYS,
+                 compact_interval=REPORT_COMPACT_INTERVAL):
+        self.path = path
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = None
+        self._last_compact = time.time()
+        self._compacting = False
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # auto_vacuum only takes effect before the first table is created.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                self._connect()
+            conn = self._local.conn = sqlite3.connect(self.path, check_same_thread=False)
+        return conn
+
+    def put(self, kind, content, company=None, source=None, doc_hash=None, metadata=None):
+        """Record one item and return its id, or None if it could not be stored."""
+        if not content:
+            return None
+        now = time.time()
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        company_key = normalize_name(company) if company else None
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT id FROM reports WHERE content_hash = ? AND kind = ? AND company_key IS ? AND source IS ?",
+                    (digest, kind, company_key, source)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE reports SET updated = ? WHERE id = ?", (now, row[0]))
+                    report_id = row[0]
+                else:
+                    report_id = conn.execute(
+                        "INSERT INTO reports (kind, company, company_key, source, doc_hash, content_hash, "
+                        "created, updated, content, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (kind, company, company_key, source, doc_hash, digest,
+                         now, now, content, json.dumps(metadata) if metadata else None)
+                    ).lastrowid
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error storing {kind} report: {e}")
+            return None
+        self._maybe_compact()
+        return report_id
+
+    def get(self, report_id):
+        row = self._reader().execute(
+            f"SELECT {SUMMARY_COLUMNS}, content FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        return _row(row, with_content=True) if row else None
+
+    def search(self, text, kind=None, company=None, limit=20, offset=0):
+        """Records whose text, company or source contain every word of text, newest first, with a snippet."""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = (f"SELECT {', '.join('r.' + c.strip() for c in SUMMARY_COLUMNS.split(','))}, "
+               "snippet(reports_fts, 0, '[', ']', '…', 16) "
+               "FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid WHERE reports_fts MATCH ?")
+        params = [query]
+        if kind:
+            sql += " AND r.kind = ?"
+            params.append(kind)
+        if company:
+            # Narrowing on the company column inside the FTS query lets the index intersect the
+            # two word lists instead of filtering every match of a common term afterwards.
+            company_query = fts_query(normalize_name(company))
+            if company_query:
+                params[0] = f"company : ({company_query}) AND ({query})"
+            sql += " AND r.company_key = ?"
+            params.append(normalize_name(company))
+        # FTS5 walks rowids in descending order directly, so newest first needs no sort.
+        sql += " ORDER BY reports_fts.rowid DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        results = []
+        for row in self._reader().execute(sql, params):
+            record = _row(row)
+            record['snippet'] = row[8]
+            results.append(record)
+        return results
+
+    def latest(self, company=None, source=None, kind="risk_report", with_content=True):
+        """The most recently recorded item of kind for a company (matched on its normalized name) or a source."""
+        if company:
+            where, value = "company_key = ?", normalize_name(company)
+        else:
+            where, value = "source = ?", source
+        row = self._reader().execute(
+            f"SELECT {SUMMARY_COLUMNS}, content FROM reports WHERE {where} AND kind = ? "
+            "ORDER BY updated DESC LIMIT 1", (value, kind)
+        ).fetchone()
+        return _row(row, with_content) if row else None
+
+    def stats(self):
+        conn = self._reader()
+        counts = dict(conn.execute("SELECT kind, COUNT(*) FROM reports GROUP BY kind").fetchall())
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {
+            'records': counts,
+            'size_mb': round(page_count * page_size / 1048576, 1),
+            'free_mb': round(free_pages * page_size / 1048576, 1)
+        }
+
+    def compact(self, retention_days=None):
+        """
+        Drop records not updated within retention_days (if set), merge the FTS
+        index segments and hand freed pages back to the filesystem.
+        Returns the number of records removed.
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        removed = 0
+        if retention_days:
+            cutoff = time.time() - retention_days * 86400
+            # Small batches keep each write lock short, so requests are not held up.
+            while True:
+                with self._lock:
+                    conn = self._connect()
+                    cursor = conn.execute(
+                        "DELETE FROM reports WHERE id IN (SELECT id FROM reports WHERE updated < ? LIMIT 500)",
+                        (cutoff,)
+                    )
+                    conn.commit()
+                removed += cursor.rowcount
+                if cursor.rowcount < 500:
+                    break
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT INTO reports_fts (reports_fts) VALUES ('optimize')")
+            conn.commit()
+            # execute() would free a single page per call; executescript runs the pragma to completion.
+            conn.executescript("PRAGMA incremental_vacuum;")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"Report store compacted; removed {removed} records.")
+        return removed
+
+    def _maybe_compact(self):
+        with self._lock:
+            if self._compacting or time.time() - self._last_compact < self.compact_interval:
+                return
+            self._compacting = True
+            self._last_compact = time.time()
+        threading.Thread(target=self._compact_in_background, name="report-compact", daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except sqlite3.Error as e:
+            print(f"Report store compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+
+report_store = ReportStore()
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "search":
+        for record in report_store.search(" ".join(sys.argv[2:])):
+            print(f"#{record['id']} {record['kind']} {record['company'] or record['source']}: {record['snippet']}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "latest":
+        record = report_store.latest(company=" ".join(sys.argv[2:]))
+        print(record['content'] if record else "No report found.")
+    elif len(sys.argv) == 2 and sys.argv[1] == "compact":
+        report_store.compact()
+        print(json.dumps(report_store.stats(), indent=2))
+    else:
+        print(__doc__.strip().split("\n\n")[1])
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# streams.py
+"""
+Server-sent events for job progress: stage changes, the transcript once it
+is ready, each risk item and a final "done" event, all replayable from the
+Last-Event-ID a reconnecting client sends.
+
+With STREAM_PORT set, streams are served by one asyncio thread on that
+port, so hundreds of open streams cost a socket and a small coroutine each
+rather than a request thread. Without it, app.py serves the same stream
+from a Flask route, which holds a request thread per client.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+
+# Port of the asyncio stream server; 0 serves streams from the Flask app instead.
+STREAM_PORT = int(os.getenv("STREAM_PORT", 0))
+# Base URL clients use to reach the stream server, e.g. behind a proxy; defaults to the app's host on STREAM_PORT.
+STREAM_URL = os.getenv("STREAM_URL")
+# Seconds between comment lines that keep idle streams from being closed by proxies.
+STREAM_HEARTBEAT = int(os.getenv("STREAM_HEARTBEAT", 15))
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", 1000))
+# Milliseconds a browser waits before reconnecting a dropped stream.
+RECONNECT_MS = 3000
+PATH = re.compile(r"^/jobs/([0-9a-f]+)/events$")
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+
+
+def parse_last_event_id(value):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def job_stream(job, last_id=0, heartbeat=STREAM_HEARTBEAT):
+    """Blocking generator of the job's events after last_id, for serving from a WSGI thread."""
+    wake = threading.Event()
+    job.subscribe(wake.set)
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n".encode('utf-8')
+        while True:
+            wake.clear()
+            for event_id, event, data in job.events_after(last_id):
+                last_id = event_id
+                yield format_event(event_id, event, data)
+                if event == 'done':
+                    return
+            if not wake.wait(heartbeat):
+                yield b": heartbeat\n\n"
+    finally:
+        job.unsubscribe(wake.set)
+
+
+class EventStreamServer:
+    """
+    Minimal HTTP server that only answers GET /jobs/<id>/events with an event
+    stream. One asyncio loop in one thread serves every client; job threads
+    wake a stream through call_soon_threadsafe when they emit.
+    """
+    def __init__(self, job_manager, port=STREAM_PORT, host="0.0.0.0", heartbeat=STREAM_HEARTBEAT,
+                 max_clients=STREAM_MAX_CLIENTS):
+        self.job_manager = job_manager
+        self.port = port
+        self.host = host
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self.clients = 0
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        """Bind and serve in a background thread; raises OSError if the port cannot be bound."""
+        started = threading.Event()
+        failure = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                failure.append(e)
+                started.set()
+                return
+            self.port = server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="event-streams", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+        print(f"Event stream server listening on port {self.port}")
+        return self
+
+    def stats(self):
+        return {'clients': self.clients}
+
+    async def _respond(self, writer, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nAccess-Control-Allow-Origin: *\r\n"
+                     "Connection: close\r\n\r\n".encode('utf-8') + payload)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            request_line, *header_lines = head.decode('latin-1').split("\r\n")
+            method, target, _ = (request_line.split(" ") + ["", ""])[:3]
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            path, _, query = target.partition("?")
+            match = PATH.match(path)
+            if method != "GET" or match is None:
+                await self._respond(writer, "404 Not Found", {'error': 'Not found'})
+                return
+            job = self.job_manager.get(match.group(1))
+            if job is None:
+                await self._respond(writer, "404 Not Found", {'error': 'Unknown or expired job ID'})
+                return
+            if self.clients >= self.max_clients:
+                await self._respond(writer, "503 Service Unavailable", {'error': 'Too many open streams'})
+                return
+            # EventSource sends Last-Event-ID when it reconnects; ?last_event_id= covers a fresh page.
+            last_id = headers.get("last-event-id") or dict(
+                pair.partition("=")[::2] for pair in query.split("&") if pair).get("last_event_id")
+            await self._stream(writer, job, parse_last_event_id(last_id))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer, job, last_id):
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        def listener():
+            loop.call_soon_threadsafe(wake.set)
+        job.subscribe(listener)
+        self.clients += 1
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Access-Control-Allow-Origin: *\r\nX-Accel-Buffering: no\r\nConnection: close\r\n\r\n"
+                         + f"retry: {RECONNECT_MS}\n\n".encode('utf-8'))
+            while True:
+                wake.clear()
+                for event_id, event, data in job.events_after(last_id):
+                    last_id = event_id
+                    writer.write(format_event(event_id, event, data))
+                    if event == 'done':
+                        await writer.drain()
+                        return
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(wake.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+        finally:
+            self.clients -= 1
+            job.unsubscribe(listener)
@@ -0,0 +1,204 @@
+# transcript_cache.py
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: aliases are then only serialized within one process.
+    fcntl = None
+
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join("cache", "transcripts"))
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", 200))
+# Puts between rescans of the directory, which also pick up entries written by other processes.
+EVICT_SCAN_EVERY = 100
+
+
+def audio_key(audio_filename, chunk_size=1048576):
+    """SHA-256 of the downloaded audio (or video) file, used as the primary cache key."""
+    digest = hashlib.sha256()
+    with open(audio_filename, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data: break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    On-disk cache of AssemblyAI transcript JSON.
+    Entries are stored as <media sha256>.json; recency is tracked through the
+    file mtime so the least recently used entries are evicted first once the
+    directory grows past max_bytes. Platform video IDs (e.g. "TikTok:7301...")
+    are kept in aliases.json and point at an audio key, so a repeat URL can
+    skip the download entirely. Several processes may share the directory:
+    aliases.json is re-read and merged under a file lock before each write,
+    and the directory size is tracked from this process's own writes between
+    periodic rescans.
+    """
+    def __init__(self, directory=TRANSCRIPT_CACHE_DIR, max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._aliases = None
+        self._aliases_mtime = None
+        self._total = None
+        self._puts_since_scan = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _alias_path(self):
+        return os.path.join(self.directory, "aliases.json")
+
+    def _load_aliases(self):
+        """aliases.json, re-read only when another writer has replaced it since the last read."""
+        try:
+            mtime = os.stat(self._alias_path()).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._aliases is None or mtime != self._aliases_mtime:
+            try:
+                with open(self._alias_path(), 'r', encoding='utf-8') as f:
+                    self._aliases = json.load(f)
+            except (OSError, ValueError):
+                self._aliases = {}
+            self._aliases_mtime = mtime
+        return self._aliases
+
+    @contextlib.contextmanager
+    def _alias_file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "aliases.lock"), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _update_aliases(self, update):
+        """Apply update(aliases) to the current aliases.json and write it back if it changed anything."""
+        with self._alias_file_lock():
+            # Always re-read under the lock: mtimes are too coarse on some filesystems to trust here.
+            self._aliases = None
+            aliases = dict(self._load_aliases())
+            if update(aliases):
+                self._write_json(self._alias_path(), aliases)
+                self._aliases = aliases
+                self._aliases_mtime = os.stat(self._alias_path()).st_mtime_ns
+
+    def _write_json(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        # Thread idents repeat across processes sharing the directory, so the pid is part of the name too.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                transcript_json = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return transcript_json
+
+    def get(self, key):
+        with self._lock:
+            transcript_json = self._read(key)
+            if transcript_json is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return transcript_json
+
+    def get_by_video_id(self, video_id):
+        """
+        Only hits are counted here: a miss is followed by a lookup by media
+        hash, which counts for the request either way.
+        """
+        with self._lock:
+            key = self._load_aliases().get(video_id)
+            transcript_json = self._read(key) if key is not None else None
+            if transcript_json is not None:
+                self.hits += 1
+            return transcript_json
+
+    def put(self, key, transcript_json, video_id=None):
+        with self._lock:
+            path = self._path(key)
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            self._write_json(path, transcript_json)
+            if video_id:
+                self._add_alias(video_id, key)
+            self._puts_since_scan += 1
+            if self._total is not None:
+                self._total += os.path.getsize(path) - previous
+            if self._total is None or self._total > self.max_bytes or self._puts_since_scan >= EVICT_SCAN_EVERY:
+                self._evict()
+
+    def add_alias(self, video_id, key):
+        with self._lock:
+            self._add_alias(video_id, key)
+
+    def _add_alias(self, video_id, key):
+        if self._load_aliases().get(video_id) == key:
+            return
+        def update(aliases):
+            if aliases.get(video_id) == key:
+                return False
+            aliases[video_id] = key
+            return True
+        self._update_aliases(update)
+
+    def _evict(self):
+        """Rescan the directory, evicting the least recently used entries while it is over max_bytes."""
+        self._puts_since_scan = 0
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == 'aliases.json':
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # evicted by another process meanwhile
+            entries.append((stat.st_mtime, stat.st_size, name[:-5]))
+            total += stat.st_size
+        entries.sort()
+        evicted = set()
+        while total > self.max_bytes and entries:
+            _, size, key = entries.pop(0)
+            with contextlib.suppress(OSError):
+                os.remove(self._path(key))
+            evicted.add(key)
+            total -= size
+        self._total = total
+        if evicted:
+            def update(aliases):
+                stale = [v for v, k in aliases.items() if k in evicted]
+                for video_id in stale:
+                    del aliases[video_id]
+                return bool(stale)
+            self._update_aliases(update)
+            print(f"Transcript cache evicted {len(evicted)} entries.")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+transcript_cache = TranscriptCache()